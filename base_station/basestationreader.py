@@ -1,11 +1,13 @@
 import enum
+from collections import deque
 from datetime import datetime as dt
 from datetime import timedelta
-from re import Pattern
+from re import Pattern, compile, escape, DOTALL
 from typing import Optional
 
 from serial import SerialException
 
+from reading import Reading
 from serialreaderwriter import SerialReaderWriter
 
 
@@ -19,105 +21,171 @@ class ReadResult(enum.IntEnum):
     CRITICAL = 5  # unknown message
 
 
+NO_DATA_MESSAGE = "No data was waiting on serial buffer."
+NOT_CONNECTING_MESSAGE = "BaseStation not connecting."
+
+DATA_MESSAGE = "sensor: %d, wheatstone voltage: % .5f, range: %d, log amp voltage: % .5f, battery voltage: % .5f"
+RECEIVED_MESSAGE = "Received '%s'."
+RECONNECTED_MESSAGE = "BaseStation reconnected on %s after %.1f s."
+
+# prefixes of lines sent by the BaseStation that aren't data, by severity
+DEBUG_PREFIXES = ("Timeout connecting to device", "Couldn't connect to device",
+                  "Couldn't discover attributes of device", "Couldn't read data from device")
+ERROR_PREFIXES = ("Restarting BaseStation",)
+
+MAX_SENSOR_ID = 2 ** 63 - 1  # largest sensor id ReadingBatch can store, data lines with larger ones are unknown lines
+
+
+class ReadMessage:
+    """A message that is only formatted when converted to a string, so messages that are never logged cost nothing."""
+
+    __slots__ = ("fmt", "args")
+
+    def __init__(self, fmt, *args):
+        self.fmt = fmt
+        self.args = args
+
+    def __str__(self):
+        return self.fmt % self.args
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, ReadMessage):
+            return self.fmt == other.fmt and self.args == other.args
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.fmt, self.args))
+
+
+class LineClassifier:
+    def __init__(self, data_pattern: Pattern, debug_prefixes=DEBUG_PREFIXES, error_prefixes=ERROR_PREFIXES):
+        """
+        Classifies lines received from the BaseStation and extracts their data with a single regex match.
+
+        Args:
+            data_pattern: regex Pattern used to match data. Groups: sensor_id, voltage, range, log amp voltage,
+                          battery voltage
+            debug_prefixes: lines starting with any of these are debugging information
+            error_prefixes: lines starting with any of these are errors
+        """
+        self.data_groups = tuple(range(2, 2 + data_pattern.groups))  # data_pattern's groups, shifted by the "data" group
+        self.pattern = compile("|".join([
+            f"(?P<data>{data_pattern.pattern})",
+            f"(?P<debug>(?:{'|'.join(map(escape, debug_prefixes))}).*)",
+            f"(?P<error>(?:{'|'.join(map(escape, error_prefixes))}).*)",
+        ]), data_pattern.flags | DOTALL)
+
+    def classify(self, line: str) -> (ReadResult, Optional[int], Optional[float], Optional[int], Optional[float], Optional[float]):
+        """
+        Returns:
+            (ReadResult, int | None, float | None, int | None, float | None, float | None):
+                the line's status: SUCCESS for data, otherwise DEBUG, ERROR or CRITICAL (unknown line, or data with a
+                sensor id above MAX_SENSOR_ID),
+                then sensor id, wheatstone voltage, range, log amp voltage and battery voltage (None unless data).
+        """
+        match = self.pattern.fullmatch(line)
+        if match is None:
+            return ReadResult.CRITICAL, None, None, None, None, None
+
+        kind = match.lastgroup
+        if kind == "data":
+            sensor_id, voltage, mrange, logvoltage, batvoltage = match.group(*self.data_groups)
+            if int(sensor_id) > MAX_SENSOR_ID:  # noise on the line, and would overflow ReadingBatch's sensor ids
+                return ReadResult.CRITICAL, None, None, None, None, None
+            return ReadResult.SUCCESS, int(sensor_id), float(voltage), int(mrange), float(logvoltage), float(batvoltage)
+        if kind == "debug":
+            return ReadResult.DEBUG, None, None, None, None, None
+        return ReadResult.ERROR, None, None, None, None, None
+
+    def classify_many(self, lines) -> list:
+        """Classify every line in lines. Returns a list of the results of classify(), in the same order."""
+        classify = self.classify
+        return [classify(line) for line in lines]
+
+
+# Readings returned by polls that found nothing to do. These make up most reads, so they are shared rather than
+# allocated on every call and must not be modified. Compare against them with `is`.
+NO_DATA = Reading(ReadResult.DEBUG, NO_DATA_MESSAGE)
+NOT_CONNECTING = Reading(ReadResult.DEBUG, NOT_CONNECTING_MESSAGE)
+IDLE_READINGS = (NO_DATA, NOT_CONNECTING)
+
+
 class BaseStationReader:
     def __init__(self, reader: SerialReaderWriter, pattern: Pattern, timeout: timedelta):
         """
         Args:
             reader: SerialReader to read data from. Will try to reconnect on read if disconnected.
-            pattern: regex Pattern used to match data. Group 1: sensor_id, Group 2: voltage, Group 3: range
+            pattern: regex Pattern used to match data. Group 1: sensor_id, Group 2: voltage, Group 3: range,
+                     Group 4: log amp voltage, Group 5: battery voltage
             timeout: how long to wait for a non-responsive SerialReader before disconnecting
         """
         self.reader = reader
         self.pattern = pattern
+        self.classifier = LineClassifier(pattern)
         self.timeout = timeout
         self.last_read_time = dt.now()
+        self.pending = deque()  # lines already pulled from the serial buffer, waiting to be parsed
+        self.reconnects = 0  # connections made after the first one, for diagnostics
 
-    def read(self) -> (Optional[int], Optional[float], Optional[int], Optional[float], Optional[float], str, ReadResult):
+    def read(self) -> Reading:
         """
         Tries to read voltage and range from the provided SerialReaderWriter according to the provided pattern.
+        Each call handles one line. Every complete line waiting on the serial buffer is pulled at once and the rest
+        are handed out by the following calls, so this never blocks waiting for a line to be completed.
 
         Returns:
-            (int | None, float | None, int | None, str, ReadResult):
-                int: the sensor id (or None). <br>
-                float: the voltage (or None). <br>
-                int: the range (or None). <br>
-                str: a message summarizing what happened during the read. <br>
-                ReadResult: the status of the read.
+            Reading: the status of the read, a message summarizing what happened during the read and, if the status
+                     is ReadResult.SUCCESS, the sensor id, voltage, range, log amp voltage and battery voltage.
+                     When there was nothing to read, one of the shared IDLE_READINGS is returned.
         """
 
         current_time = dt.now()
-        sensor_id, voltage, mrange, logvoltage, batvoltage, message, status = None, None, None, None, None, "", ReadResult.ERROR
 
         if not self.reader.is_connected():
 
             if self.reader.connect():
-                message = "BaseStation connected."
-                status = ReadResult.INFO
                 self.last_read_time = current_time
-                return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
+                if self.reader.reconnect_latency is not None:
+                    self.reconnects += 1
+                    return Reading(ReadResult.INFO, ReadMessage(RECONNECTED_MESSAGE, self.reader.com, self.reader.reconnect_latency))
+                return Reading(ReadResult.INFO, "BaseStation connected.")
 
-            message = "BaseStation not connecting."
-            status = ReadResult.DEBUG
-            return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
+            return NOT_CONNECTING
 
         try:
-            if self.reader.has_waiting():
+            if not self.pending and self.reader.has_waiting():
                 self.last_read_time = current_time
-                data = self.reader.read()
-                match = self.pattern.fullmatch(data)
-
-                if match:
-                    sensor_id = int(match.group(1))  # convert sensor id to int
-                    voltage = float(match.group(2))  # convert voltage to float
-                    mrange = int(match.group(3))  # convert range to int
-                    logvoltage = float(match.group(4))	#convert logvoltage to float
-                    batvoltage = float(match.group(5))	#convert batvoltage to float
-                    message = f"sensor: {sensor_id}, wheatstone voltage: {voltage: .5f}, range: {mrange}, log amp voltage: {logvoltage: .5f}, battery voltage: {batvoltage: .5f}"
-                    status = ReadResult.SUCCESS
-                    return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
-
-                # determine severity of message received
-                debug = any([
-                    data.startswith("Timeout connecting to device"),
-                    data.startswith("Couldn't connect to device"),
-                    data.startswith("Couldn't discover attributes of device"),
-                    data.startswith("Couldn't read data from device")
-                ])
-
-                error = data.startswith("Restarting BaseStation")
-
-                if debug:
-                    status = ReadResult.DEBUG
-                elif error:
-                    status = ReadResult.ERROR
-                else:
-                    status = ReadResult.CRITICAL
-
-                message = f"Received '{data}'."
-                return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
+                self.pending.extend(self.reader.iter_lines())
+
+            if self.pending:
+                data = self.pending.popleft()
+                if isinstance(data, UnicodeDecodeError):
+                    raise data
+
+                status, sensor_id, voltage, mrange, logvoltage, batvoltage = self.classifier.classify(data)
+                if status == ReadResult.SUCCESS:
+                    message = ReadMessage(DATA_MESSAGE, sensor_id, voltage, mrange, logvoltage, batvoltage)
+                    return Reading(status, message, sensor_id, voltage, mrange, logvoltage, batvoltage)
+                return Reading(status, ReadMessage(RECEIVED_MESSAGE, data))
 
             else:
                 if current_time - self.last_read_time >= self.timeout:
-                    message = "BaseStation timed out. Disconnecting."
-                    status = ReadResult.ERROR
                     self.last_read_time = current_time
                     self.reader.disconnect()
-                    return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
+                    return Reading(ReadResult.ERROR, "BaseStation timed out. Disconnecting.")
 
-                message = "No data was waiting on serial buffer."
-                status = ReadResult.DEBUG
-                return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
+                return NO_DATA
 
         except SerialException:
-            message = "BaseStation connection lost."
-            status = ReadResult.ERROR
+            self.pending.clear()
             self.reader.disconnect()  # release serial port
-            return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
+            return Reading(ReadResult.ERROR, "BaseStation connection lost.")
 
         except UnicodeDecodeError:
-            message = "Data could not be decoded properly"
-            status = ReadResult.ERROR
-            return sensor_id, voltage, mrange, logvoltage, batvoltage, message, status
+            return Reading(ReadResult.ERROR, "Data could not be decoded properly")
 
     def close(self):
         self.reader.disconnect()
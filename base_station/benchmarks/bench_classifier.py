@@ -0,0 +1,117 @@
+"""
+Compares lines/sec of the single-pass LineClassifier against the previous line handling in BaseStationReader.read
+(fullmatch, then a chain of startswith checks, with the message always formatted).
+
+Run from anywhere: python benchmarks/bench_classifier.py [--lines N] [--repeat R]
+"""
+import argparse
+import random
+import sys
+import time
+from os import path
+from re import compile
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from basestationreader import LineClassifier, ReadMessage, ReadResult, DATA_MESSAGE, RECEIVED_MESSAGE
+from reading import Reading
+
+DATA_PATTERN = compile(r"(\d+)\s+(\d+(?:\.\d+)?)\s+(\d)\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)")
+
+# roughly the mix seen from a LoRa BaseStation: mostly data, some connection chatter, a few unknown lines
+NON_DATA_LINES = [
+    "Couldn't connect to device 7",
+    "Timeout connecting to device 3",
+    "Couldn't read data from device 12",
+    "Restarting BaseStation",
+    "Feather LoRa RX Test!",
+    "RSSI: -87",
+]
+
+
+def make_lines(n, data_fraction=0.8, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(n):
+        if rng.random() < data_fraction:
+            lines.append(f"{rng.randint(1, 40)} {rng.uniform(0, 3.3):.5f} {rng.randint(0, 3)} "
+                         f"{rng.uniform(0, 2):.5f} {rng.uniform(3.3, 4.2):.5f}")
+        else:
+            lines.append(rng.choice(NON_DATA_LINES))
+    return lines
+
+
+def legacy_parse(data):
+    """Line handling of BaseStationReader.read before LineClassifier, kept for comparison."""
+    sensor_id, voltage, mrange, logvoltage, batvoltage = None, None, None, None, None
+    match = DATA_PATTERN.fullmatch(data)
+    if match:
+        sensor_id = int(match.group(1))
+        voltage = float(match.group(2))
+        mrange = int(match.group(3))
+        logvoltage = float(match.group(4))
+        batvoltage = float(match.group(5))
+        message = f"sensor: {sensor_id}, wheatstone voltage: {voltage: .5f}, range: {mrange}, log amp voltage: {logvoltage: .5f}, battery voltage: {batvoltage: .5f}"
+        return sensor_id, voltage, mrange, logvoltage, batvoltage, message, ReadResult.SUCCESS
+
+    debug = any([
+        data.startswith("Timeout connecting to device"),
+        data.startswith("Couldn't connect to device"),
+        data.startswith("Couldn't discover attributes of device"),
+        data.startswith("Couldn't read data from device")
+    ])
+    error = data.startswith("Restarting BaseStation")
+    status = ReadResult.DEBUG if debug else ReadResult.ERROR if error else ReadResult.CRITICAL
+    return sensor_id, voltage, mrange, logvoltage, batvoltage, f"Received '{data}'.", status
+
+
+def current_parse(classifier):
+    classify = classifier.classify
+
+    def parse(data):
+        status, sensor_id, voltage, mrange, logvoltage, batvoltage = classify(data)
+        if status == ReadResult.SUCCESS:
+            message = ReadMessage(DATA_MESSAGE, sensor_id, voltage, mrange, logvoltage, batvoltage)
+            return Reading(status, message, sensor_id, voltage, mrange, logvoltage, batvoltage)
+        return Reading(status, ReadMessage(RECEIVED_MESSAGE, data))
+
+    return parse
+
+
+def lines_per_second(func, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(lines)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200_000, help="number of lines to classify per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per variant, the best is reported")
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines)
+    classifier = LineClassifier(DATA_PATTERN)
+    parse = current_parse(classifier)
+
+    # both variants must agree before their speed means anything
+    for line in lines[:1000]:
+        old, new = legacy_parse(line), parse(line)
+        assert old == (new.sensor_id, new.voltage, new.mrange, new.logvoltage, new.batvoltage, str(new.message), new.status), line
+
+    results = {
+        "legacy (fullmatch + startswith chain + f-string)": lines_per_second(lambda ls: [legacy_parse(l) for l in ls], lines, args.repeat),
+        "LineClassifier.classify + lazy message": lines_per_second(lambda ls: [parse(l) for l in ls], lines, args.repeat),
+        "LineClassifier.classify_many": lines_per_second(classifier.classify_many, lines, args.repeat),
+    }
+
+    baseline = next(iter(results.values()))
+    for name, rate in results.items():
+        print(f"{name:<50} {rate:>12,.0f} lines/sec  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
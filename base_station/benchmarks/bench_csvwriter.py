@@ -0,0 +1,52 @@
+"""
+Compares rows/sec and fsync counts of CSVWriter syncing every row (the previous behaviour)
+against group commits with different durability windows.
+
+Run from anywhere: python benchmarks/bench_csvwriter.py [--rows N] [--dir DIR]
+Pass --dir on the filesystem you care about (e.g. the SD card), fsync cost depends heavily on it.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from csvwriter import CSVWriter
+
+ROW = ["01-22-2025 05:15:12 PM", 1715, "1.57559", 0, "0.00000", "3.75700"]
+
+CONFIGS = {
+    "every row (previous behaviour)": dict(sync_rows=1),
+    "every 100 rows": dict(sync_rows=100),
+    "every 500 rows or 2 s": dict(sync_rows=500, sync_interval=2.0),
+    "every 250 ms": dict(sync_rows=10**9, sync_interval=0.25),
+}
+
+
+def run(folder, name, rows, **config):
+    writer = CSVWriter(path.join(folder, f"{name}.csv"), **config)
+    start = time.perf_counter()
+    for _ in range(rows):
+        writer.write(ROW)
+    writer.close()
+    return rows / (time.perf_counter() - start), writer.fsync_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000, help="rows written per configuration")
+    parser.add_argument("--dir", help="folder to write to, defaults to a temporary folder")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as folder:
+        baseline = None
+        for i, (name, config) in enumerate(CONFIGS.items()):
+            rate, fsyncs = run(folder, f"config{i}", args.rows, **config)
+            baseline = baseline or rate
+            print(f"{name:<32} {rate:>12,.0f} rows/sec  ({rate / baseline:6.1f}x)  {fsyncs:>6} fsyncs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compares messages/sec logged from the hot loop by the previous synchronous logging (handlers called on the caller's
+thread, messages formatted before logging) against Logger, which queues records for a background thread and formats
+them lazily. Reports the caller's rate, which is what the ingest loop sees, and the rate including writing every
+queued message out (close()).
+
+Run from anywhere: python benchmarks/bench_logger.py [--messages N]
+Console output goes to /dev/null; the log files go to a temporary folder.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from basestationreader import ReadMessage, DATA_MESSAGE
+from logger import Logger, LogLevel
+
+CONSOLE_MSG = "%s | %s"
+TIME = "01-22-2025 05:12:42 PM"
+
+
+def sync_logger(folder, devnull):
+    """The previous Logger: both handlers attached to the logging.Logger, so they run on the caller's thread."""
+    logger = logging.getLogger("SyncBench")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    file_handler = RotatingFileHandler(path.join(folder, "sync.log"), maxBytes=5*1024*1024, backupCount=5)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    console_handler = logging.StreamHandler(devnull)
+    console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    logger.handlers = [file_handler, console_handler]
+    return logger
+
+
+def run(n, log, close):
+    start = time.perf_counter()
+    for i in range(n):
+        log(i)
+    logged = time.perf_counter() - start
+    close()
+    return n / logged, n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50_000, help="messages logged per configuration")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder, open(os.devnull, "w") as devnull:
+        def reading(i):
+            return ReadMessage(DATA_MESSAGE, i % 16, 1.57559, 0, 0.0, 3.757)
+
+        def make_logger(name):
+            return Logger(path.join(folder, f"{name}.log"), write_level=LogLevel.INFO, stream=devnull)
+
+        def sync_config():
+            sync = sync_logger(folder, devnull)
+            return (lambda i: sync.info("{time} | {message}".format(time=TIME, message=reading(i))),
+                    lambda: [h.close() for h in sync.handlers])
+
+        def queued_config(level, lazy):
+            logger = make_logger(f"{level.name}-{lazy}")  # Loggers share the "SmartLogger" logger, one at a time
+            if lazy:
+                return lambda i: logger.log(CONSOLE_MSG, level, TIME, reading(i)), logger.close
+            return lambda i: logger.log("{time} | {message}".format(time=TIME, message=reading(i)), level), logger.close
+
+        configs = {
+            "synchronous, formatted (previous)": sync_config,
+            "queued, formatted": lambda: queued_config(LogLevel.INFO, False),
+            "queued, lazy": lambda: queued_config(LogLevel.INFO, True),
+            "queued, lazy, filtered (DEBUG)": lambda: queued_config(LogLevel.DEBUG, True),
+        }
+
+        baseline = None
+        for name, config in configs.items():
+            caller_rate, total_rate = run(args.messages, *config())
+            baseline = baseline or caller_rate
+            print(f"{name:<34} {caller_rate:>12,.0f} msg/sec on the caller ({caller_rate / baseline:5.1f}x)"
+                  f"  {total_rate:>10,.0f} msg/sec including writing")
+
+
+if __name__ == "__main__":
+    main()
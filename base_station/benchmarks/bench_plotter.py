@@ -0,0 +1,109 @@
+"""
+Compares the cost of plotting a day of points per sensor, and of redrawing the plot after each minute, between:
+    previous: lists trimmed with pop(0), window moved and figure drawn in full at every update
+    every point: ring buffers, window scrolled in steps, lines blitted on a saved background, every point drawn
+    min/max envelope: the same, drawing the min/max envelope of the points per pixel column (Plotter)
+Redraws are also timed over the last hour plotted only, to show whether their cost grows as the window fills.
+
+Run from anywhere: python benchmarks/bench_plotter.py [--sensors N] [--minutes N] [--per-minute N] [--configs ...]
+Uses the Agg backend, so it measures drawing, not the GUI. The previous plotter gets slow with many points per minute.
+"""
+import argparse
+import math
+import sys
+import time
+from os import path
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from plotter import Plotter
+
+X_RANGE = 1.0  # a day, in matplotlib date units
+MINUTE = 1 / 1440
+
+
+class PreviousPlotter(Plotter):
+    """The previous plot() and update(): list storage, the window moved and the whole figure drawn every time."""
+
+    def plot(self, x, y, label):
+        if label not in self.lines:
+            xdata, ydata = [], []
+            line, = self.ax.plot(xdata, ydata, label=label)
+            self.lines[label] = (xdata, ydata, line)
+            self.ax.legend(loc="upper left")
+        xdata, ydata, line = self.lines[label]
+        xdata.append(x)
+        ydata.append(y)
+        while len(xdata) > 1 and xdata[1] < x - self.X_RANGE:
+            xdata.pop(0)
+            ydata.pop(0)
+        line.set_xdata(xdata)
+        line.set_ydata(ydata)
+        self.ax.set_xlim([x - self.X_RANGE, x])
+
+    def _on_draw(self, event):
+        pass  # lines are drawn with the rest of the figure
+
+    def redraw(self):
+        self.fig.canvas.draw()
+
+
+class EveryPointPlotter(Plotter):
+    """Plotter drawing every point rather than their envelope."""
+
+    def _draw_lines(self):
+        for line in self.lines.values():
+            if line.changed:
+                line.line_obj.set_data(line.xdata, line.ydata)
+                line.changed = False
+            self.ax.draw_artist(line.line_obj)
+
+
+CONFIGS = {"previous": PreviousPlotter, "every point": EveryPointPlotter, "min/max envelope": Plotter}
+
+
+def run(plotter_class, sensors, minutes, per_minute):
+    """
+    Plot minutes of points of each sensor, redrawing after each minute.
+    Returns seconds plotting, drawing, and drawing over the last hour.
+    """
+    plotter = plotter_class(0.0, X_RANGE, [0, 3.3], "Voltage vs. Time", "Time", "Voltage (V)", (0.15, 3.15),
+                            capacity=per_minute * 1440 + 1)
+    plotting = drawing = last_hour = 0.0
+    for minute in range(minutes):
+        start = time.perf_counter()
+        for i in range(per_minute):
+            x = (minute + i / per_minute) * MINUTE
+            for sensor in range(sensors):
+                plotter.plot(x, 1.5 + 0.01 * sensor + 0.2 * math.sin(x * 100 + sensor), f"sensor{sensor}")
+        plotting += time.perf_counter() - start
+        start = time.perf_counter()
+        plotter.redraw()
+        drawing += time.perf_counter() - start
+        if minute >= minutes - 60:
+            last_hour += time.perf_counter() - start
+    plt.close(plotter.fig)
+    return plotting, drawing, last_hour
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sensors", type=int, default=16, help="lines plotted")
+    parser.add_argument("--minutes", type=int, default=1800, help="minutes plotted")
+    parser.add_argument("--per-minute", type=int, default=1, help="points per sensor per minute")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS), help="plotters compared")
+    args = parser.parse_args()
+
+    for name in args.configs:
+        plotting, drawing, last_hour = run(CONFIGS[name], args.sensors, args.minutes, args.per_minute)
+        print(f"{name:<18} plot: {plotting / (args.minutes * args.per_minute * args.sensors) * 1e6:7.1f} us/point"
+              f"  redraw: {drawing / args.minutes * 1e3:7.2f} ms/minute"
+              f" ({last_hour / min(60, args.minutes) * 1e3:.2f} over the last hour)")
+
+
+if __name__ == "__main__":
+    main()
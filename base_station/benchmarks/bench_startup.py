@@ -0,0 +1,81 @@
+"""
+Measures how long `python main.py --headless` takes from launch to logging its first reading from a simulated
+BaseStation (see simulator.py), against the time the previous main.py spent importing pyplot and creating the plot's
+figure before it could read anything (measured with Agg, a lower bound for TkAgg). Needs Linux for the simulated
+serial port.
+
+Run from anywhere: python benchmarks/bench_startup.py [--runs N]
+The run folders main.py writes go to a temporary folder.
+"""
+import argparse
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from os import path
+
+BASE_STATION = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, BASE_STATION)
+
+from simulator import SerialSimulator
+
+PREVIOUS_PLOT_SETUP = "import matplotlib; matplotlib.use('Agg'); import matplotlib.pyplot as plt; plt.figure()"
+
+
+def time_to_first_reading(folder, timeout=30.0):
+    """Launch main.py headless on a simulated BaseStation, returning the seconds until it logs a reading."""
+    simulator = SerialSimulator()
+    stop = threading.Event()
+
+    def feed():
+        for i in range(1_000_000):
+            if stop.wait(0.005):
+                break
+            simulator.write_line(f"1 {1 + (i % 100) / 100:.5f} 0 0.50000 3.70000")
+
+    threading.Thread(target=feed, daemon=True).start()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, path.join(BASE_STATION, "main.py"), "--headless", simulator.port],
+                               cwd=folder, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stderr:
+            if "sensor: 1" in line:
+                return time.perf_counter() - start
+            if time.perf_counter() - start > timeout:
+                break
+        raise RuntimeError("main.py didn't log a reading")
+    finally:
+        stop.set()
+        process.send_signal(signal.SIGTERM)
+        process.stderr.close()
+        process.wait(10)
+        simulator.close()
+
+
+def time_command(code):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="runs of each measurement, the median is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        headless = statistics.median(time_to_first_reading(folder) for _ in range(args.runs))
+    interpreter = statistics.median(time_command("pass") for _ in range(args.runs))
+    plot_setup = statistics.median(time_command(PREVIOUS_PLOT_SETUP) for _ in range(args.runs)) - interpreter
+
+    print(f"python startup:                               {interpreter * 1e3:8.1f} ms")
+    print(f"main.py --headless, launch to first reading:  {headless * 1e3:8.1f} ms")
+    print(f"previous plot setup before reading (Agg):    +{plot_setup * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Throughput and latency benchmarks for each stage of the base_station pipeline, and for the whole loop fed by a
+simulated BaseStation (see simulator.py). Needs Linux for the simulated serial port.
+
+For each stage, reports items/sec, p50/p99 latency per item and RSS growth, and saves everything as JSON so results
+from different versions can be compared.
+
+Examples:
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --output after.json --compare before.json
+    python benchmarks/run_benchmarks.py --stages parse csv
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime as dt, timedelta
+from math import floor
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")  # no window, but the same drawing work
+
+from basestationreader import BaseStationReader
+from csvwriter import CSVWriter, DATA_LOG_HEADER
+from ingestworker import IngestWorker
+from logger import Logger, LogLevel
+from multiportreader import MultiPortReader
+from serialreaderwriter import SerialReaderWriter
+from simulator import SerialSimulator, synthetic_lines
+
+DATA_PATTERN = re.compile(r"(\d+)\s+(\d+(?:\.\d+)?)\s+(\d)\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)")
+
+
+def rss_bytes():
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, in KiB on Linux
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, floor(p / 100 * len(sorted_values)))]
+
+
+def summarize(count, elapsed, latencies, rss_before, unit="items"):
+    latencies = sorted(latencies)
+    return {
+        "count": count,
+        "unit": unit,
+        "seconds": elapsed,
+        "per_sec": count / elapsed if elapsed else None,
+        "p50_us": percentile(latencies, 50) * 1e6 if latencies else None,
+        "p99_us": percentile(latencies, 99) * 1e6 if latencies else None,
+        "rss_growth_bytes": rss_bytes() - rss_before,
+    }
+
+
+class FakeSerial:
+    """Stands in for serial.Serial, serving pre-encoded lines in chunks as if they had just arrived."""
+
+    def __init__(self, data: bytes, chunk=4096):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.chunk = chunk
+
+    def isOpen(self):
+        return True
+
+    def inWaiting(self):
+        return min(self.chunk, len(self.data) - self.pos)
+
+    def read(self, n):
+        chunk = self.data[self.pos:self.pos + n].tobytes()
+        self.pos += n
+        return chunk
+
+    def close(self):
+        pass
+
+
+def bench_parse(n):
+    """BaseStationReader.read() over lines already waiting in the serial buffer."""
+    lines = synthetic_lines(sensors=40, rate=1, disconnect_prob=0.05, seed=0)
+    data = "".join(f"{next(lines)[1]}\r\n" for _ in range(n)).encode()
+    reader = SerialReaderWriter()
+    reader.ser = FakeSerial(data)
+    bsr = BaseStationReader(reader, DATA_PATTERN, timeout=timedelta(hours=1))
+
+    latencies = []
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    for _ in range(n):
+        t = time.perf_counter()
+        bsr.read()
+        latencies.append(time.perf_counter() - t)
+    return summarize(n, time.perf_counter() - start, latencies, rss_before, "lines")
+
+
+def bench_csv(n, folder):
+    """CSVWriter.write, one data row at a time."""
+    writer = CSVWriter(path.join(folder, "csv", "day1-sensor1.csv"))
+    writer.write(DATA_LOG_HEADER)
+    row = ["01-22-2025 05:15:12 PM", 1715, "1.57559", 0, "0.00000", "3.75700"]
+
+    latencies = []
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    for _ in range(n):
+        t = time.perf_counter()
+        writer.write(row)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    writer.close()
+    return summarize(n, elapsed, latencies, rss_before, "rows")
+
+
+def make_logger(folder):
+    """A Logger writing to a file in folder, with its console output sent to /dev/null."""
+    return Logger(path.join(folder, "logger", "errors.log"), write_level=LogLevel.INFO, stream=open(os.devnull, "w"))
+
+
+def bench_logger(n, folder):
+    """Logger.log of a reading at INFO, to the console and the rotating file."""
+    logger = make_logger(folder)
+    message = "01-22-2025 05:12:42 PM | sensor: 3, wheatstone voltage:  1.57559, range: 0, log amp voltage:  0.00000, battery voltage:  3.75700"
+
+    latencies = []
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    for _ in range(n):
+        t = time.perf_counter()
+        logger.log(message, LogLevel.INFO)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    close_logger(logger)
+    return summarize(n, elapsed, latencies, rss_before, "messages")
+
+
+def close_logger(logger):
+    logger.close()
+    logger.handlers[1].stream.close()  # /dev/null
+
+
+def bench_plot(sensors, hours=24):
+    """RealTimePlotter.plot with a full window of one point per minute per sensor, then drawing the figure."""
+    import matplotlib.pyplot as plt
+    from matplotlib.dates import DateFormatter, HourLocator, DayLocator
+    from realtimeplotter import RealTimePlotter
+
+    start_time = dt(2025, 1, 22, 17, 12, 21)
+    p = RealTimePlotter(xstart=start_time, xrange=timedelta(hours=hours), yrange=[0, 3.3],
+                        title="Voltage vs. Time", xlabel="Time", ylabel="Voltage (V)", solid_lines=(0.15, 3.15),
+                        x_minor_locator=HourLocator(interval=4), x_minor_formatter=DateFormatter("%I:%M %p"),
+                        x_major_locator=DayLocator(interval=1), x_major_formatter=DateFormatter("\n%m-%d-%Y"))
+
+    minutes = hours * 60
+    latencies = []
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    for minute in range(minutes):
+        now = start_time + timedelta(minutes=minute)
+        t = time.perf_counter()
+        for sensor in range(1, sensors + 1):
+            p.plot(now, 1.5 + sensor / 100, f"sensor{sensor}")
+        latencies.append(time.perf_counter() - t)
+    plot_elapsed = time.perf_counter() - start
+
+    draws = []
+    for _ in range(5):
+        t = time.perf_counter()
+        p.fig.canvas.draw()
+        draws.append(time.perf_counter() - t)
+    plt.close(p.fig)
+
+    result = summarize(minutes * sensors, plot_elapsed, [l / sensors for l in latencies], rss_before, "points")
+    result["draw_p50_ms"] = percentile(sorted(draws), 50) * 1e3
+    return result
+
+
+def bench_loop(n, folder, sensors=40):
+    """
+    The whole pipeline: a simulated BaseStation on a pty, IngestWorker, then the same per-batch work as main.py
+    (CSV writes and logging). Latency is from writing a line to the pty to it being written to its CSV file.
+    """
+    sim = SerialSimulator()
+    bsr = BaseStationReader(SerialReaderWriter(sim.port, 9600, timeout=360, fallback=False), DATA_PATTERN,
+                            timeout=timedelta(hours=1))
+    worker = IngestWorker(MultiPortReader({sim.port: bsr}), maxsize=n + 1)
+    logger = make_logger(folder)
+    writers = {}
+    sent = {}  # sequence number -> time written to the pty
+
+    # warm up the connection before timing
+    worker.start()
+    while not bsr.reader.is_connected():
+        time.sleep(0.01)
+
+    def feed():
+        for i in range(n):
+            # the log amp voltage field carries a sequence number, to match lines up with their send time
+            sent[i] = time.perf_counter()
+            sim.write_line(f"{i % sensors + 1} 1.50000 0 {i}.0 3.70000")
+            if i % 200 == 199:
+                time.sleep(0.001)  # let the reader keep up, so the pty buffer never fills
+
+    latencies = []
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    feeder = threading.Thread(target=feed)
+    feeder.start()
+
+    received = 0
+    last_received = time.monotonic()
+    while received < n and (feeder.is_alive() or time.monotonic() - last_received < 1.0):
+        batch, events = worker.get_batch()
+        for event in events:
+            logger.log(event[2].message, LogLevel(int(event[2].status)))
+        for sensor_id, rows in batch.rows_by_sensor().items():
+            if sensor_id not in writers:
+                writers[sensor_id] = CSVWriter(path.join(folder, "loop", f"day1-sensor{sensor_id}.csv"))
+            writers[sensor_id].write_many(
+                [batch.timestamp[i], 0, "%.5f" % batch.voltage[i], batch.mrange[i], "%.5f" % batch.logvoltage[i],
+                 "%.5f" % batch.batvoltage[i]] for i in rows)
+            done = time.perf_counter()
+            latencies.extend(done - sent[int(batch.logvoltage[i])] for i in rows)
+        for i in range(len(batch)):
+            logger.log("sensor: %d", LogLevel.INFO, batch.sensor_id[i])
+        received += len(batch)
+        if batch:
+            last_received = time.monotonic()
+        else:
+            time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    feeder.join()
+    worker.stop(timeout=1)
+    for writer in writers.values():
+        writer.close()
+    close_logger(logger)
+    sim.close()
+
+    result = summarize(received, elapsed, latencies, rss_before, "lines")
+    result["sent"] = n
+    result["dropped"] = n - received
+    result["pty_bytes_dropped"] = sim.bytes_dropped
+    return result
+
+
+STAGES = {
+    "parse": lambda args, folder: bench_parse(args.lines),
+    "csv": lambda args, folder: bench_csv(args.rows, folder),
+    "logger": lambda args, folder: bench_logger(args.lines, folder),
+    "plot": lambda args, folder: bench_plot(args.sensors),
+    "loop": lambda args, folder: bench_loop(args.loop_lines, folder, args.sensors),
+}
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as file:
+        baseline = json.load(file)["stages"]
+    print(f"\nCompared to {baseline_path}:")
+    for stage, result in results.items():
+        old = baseline.get(stage)
+        if old and old.get("per_sec") and result.get("per_sec"):
+            print(f"  {stage:<8} {result['per_sec'] / old['per_sec']:6.2f}x throughput, "
+                  f"p99 {old['p99_us']:.1f} -> {result['p99_us']:.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES), help="stages to run")
+    parser.add_argument("--lines", type=int, default=100_000, help="lines for the parse and logger stages")
+    parser.add_argument("--rows", type=int, default=2_000, help="rows for the csv stage (each one is fsynced)")
+    parser.add_argument("--loop-lines", type=int, default=20_000, help="lines sent through the whole loop")
+    parser.add_argument("--sensors", type=int, default=40, help="sensors in the plot and loop stages")
+    parser.add_argument("--output", help="JSON file to save the results to")
+    parser.add_argument("--compare", metavar="JSON", help="results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for stage in args.stages:
+            results[stage] = result = STAGES[stage](args, folder)
+            p50 = f"{result['p50_us']:.1f}" if result['p50_us'] is not None else "-"
+            p99 = f"{result['p99_us']:.1f}" if result['p99_us'] is not None else "-"
+            print(f"{stage:<8} {result['per_sec']:>12,.0f} {result['unit']}/sec   p50 {p50:>8} us   "
+                  f"p99 {p99:>8} us   RSS +{result['rss_growth_bytes'] / 1024:,.0f} KiB")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "time": dt.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args),
+                "stages": results,
+            }, file, indent=2)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
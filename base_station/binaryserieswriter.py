@@ -0,0 +1,169 @@
+"""
+Append-only binary time series of one sensor's readings, written next to its day{i}-sensor{sensor}.csv.
+
+A segment file is a 16 byte header (magic, version, record size, start of the run in ns since the epoch) followed by
+fixed-width little-endian records:
+    int64 timestamp (ns since the epoch), float32 wheatstone voltage, float32 log amp voltage,
+    float32 battery voltage, uint8 range
+Voltages are stored as float32, so keep about 7 significant digits.
+
+Segments can be loaded as NumPy arrays backed directly by the file (see read_segment), or exported to the CSV
+format of the data logs:
+    python binaryserieswriter.py logs/01-22-2025_T17-12-21/day1-sensor3.bin -o day1-sensor3.csv
+"""
+import argparse
+import csv
+import struct
+import sys
+import time
+from datetime import datetime as dt
+from math import floor
+from os import makedirs, path, fsync
+
+from csvwriter import DATA_LOG_HEADER
+
+MAGIC = b"SBTS"
+VERSION = 1
+RECORD = struct.Struct("<qfffB")
+HEADER = struct.Struct("<4sHHq")  # magic, version, record size, start time (ns since the epoch)
+
+# NumPy dtype matching RECORD, for readers
+RECORD_FIELDS = [("timestamp", "<i8"), ("voltage", "<f4"), ("logvoltage", "<f4"), ("batvoltage", "<f4"), ("mrange", "u1")]
+
+
+def _get_file(file_path, start_ns):
+    makedirs(path.dirname(file_path), exist_ok=True)
+    file = open(file_path, 'ab')
+    if file.tell() == 0:
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, start_ns))
+    return file
+
+
+class BinarySeriesWriter:
+    def __init__(self, file_path, start_time=None, sync_rows=1, sync_interval=None):
+        """
+        Appends readings to a binary segment file, group committing them like CSVWriter.
+
+        Args:
+            file_path: segment file to append to. Its folder is created if needed.
+            start_time: datetime the run started, stored in the header so exports can rebuild the .1s delta column.
+                        Defaults to now.
+            sync_rows: most records written between syncs.
+            sync_interval: most seconds a record waits to be synced, or None for no time limit.
+        """
+        self.start_ns = int((start_time or dt.now()).timestamp() * 1e9)
+        self.path = file_path
+        self.file = _get_file(file_path, self.start_ns)
+        self.sync_rows = sync_rows
+        self.sync_interval = sync_interval
+        self.pending = 0
+        self.pending_since = None
+        self.rows_written = 0
+        self.fsync_count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def flush(self):
+        """Flush the file buffer and sync every pending record to disk."""
+        if self.pending:
+            self.file.flush()
+            fsync(self.file.fileno())
+            self.fsync_count += 1
+            self.pending = 0
+            self.pending_since = None
+
+    def sync_if_due(self):
+        """Sync pending records if sync_rows of them are pending, or the oldest has waited sync_interval seconds or more."""
+        if self.pending and (self.pending >= self.sync_rows or (
+                self.sync_interval is not None and time.monotonic() - self.pending_since >= self.sync_interval)):
+            self.flush()
+
+    def write(self, timestamp, voltage, mrange, logvoltage, batvoltage):
+        """Append one reading, received at timestamp (seconds since the epoch)."""
+        self.write_many([(timestamp, voltage, mrange, logvoltage, batvoltage)])
+
+    def write_many(self, readings):
+        """Append every (timestamp, voltage, range, log amp voltage, battery voltage) in readings with one write."""
+        pack = RECORD.pack
+        data = b"".join(pack(round(ts * 1e9), v, lv, bv, r) for ts, v, r, lv, bv in readings)
+        if data:
+            self.file.write(data)
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            count = len(data) // RECORD.size
+            self.pending += count
+            self.rows_written += count
+            self.sync_if_due()
+
+    def set_file(self, file_path):
+        """Change the file this object will write to."""
+        self.close()
+        self.path = file_path
+        self.file = _get_file(file_path, self.start_ns)
+
+
+def read_header(file_path):
+    """Return the start time (ns since the epoch) stored in a segment's header. Raises ValueError if it isn't one."""
+    with open(file_path, 'rb') as file:
+        raw = file.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{file_path} is too short to be a binary series segment")
+    magic, version, record_size, start_ns = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{file_path} is not a version {VERSION} binary series segment")
+    return start_ns
+
+
+def read_segment(file_path):
+    """
+    Return the records of a segment as a NumPy structured array (fields: timestamp, voltage, logvoltage,
+    batvoltage, mrange) memory-mapped from the file, so nothing is read until it is used and nothing is copied.
+    A partially written last record is ignored.
+    """
+    import numpy as np
+
+    read_header(file_path)
+    dtype = np.dtype(RECORD_FIELDS)
+    count = (path.getsize(file_path) - HEADER.size) // dtype.itemsize
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(file_path, dtype=dtype, mode='r', offset=HEADER.size, shape=(count,))
+
+
+def load_segments(file_paths):
+    """Return the records of several segments (e.g. every day of one sensor) as one array, in the order given."""
+    import numpy as np
+
+    segments = [read_segment(p) for p in file_paths]
+    return np.concatenate(segments) if segments else np.empty(0, dtype=np.dtype(RECORD_FIELDS))
+
+
+def export_csv(file_path, out):
+    """Write a segment's records to the file object out, in the CSV format of the data logs."""
+    start_ns = read_header(file_path)
+    records = read_segment(file_path)
+    writer = csv.writer(out, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(DATA_LOG_HEADER)
+    for ts, v, lv, bv, r in records.tolist():
+        t_str = dt.fromtimestamp(ts / 1e9).strftime("%m-%d-%Y %I:%M:%S %p")
+        t_delta = floor((ts - start_ns) / 1e8)  # time delta in tenths of seconds
+        writer.writerow([t_str, t_delta, "%.5f" % v, r, "%.5f" % lv, "%.5f" % bv])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("segment", help="binary series segment (.bin) to export")
+    parser.add_argument("-o", "--output", help="CSV file to write, defaults to standard output")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, 'w', newline='') as out:
+            export_csv(args.segment, out)
+    else:
+        export_csv(args.segment, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,112 @@
 import csv
-# import boto3
-# from botocore.exceptions import NoCredentialsError
+import time
 from os import makedirs, path, fsync
 
-def _get_file(file_path):
+from timeindex import IndexWriter
+
+# header of the per-sensor data logs
+DATA_LOG_HEADER = ["Time (mm-dd-yyyy H:M:S)", "Time (.1s Delta)", "Wheatstone Voltage (V)", "Range", "Log Amp Voltage", "Battery Voltage"]
+
+def _get_file(file_path, header=None):
     makedirs(path.dirname(file_path), exist_ok=True)
     file = open(file_path, 'a', newline='')
     csvwriter = csv.writer(file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    if header and file.tell() == 0:  # only new files get a header, reopened ones are appended to
+        csvwriter.writerow(header)
     return file, csvwriter
 
 class CSVWriter:
-    # def __init__(self, file_path, s3_bucket='smartbricksbucket', s3_key_prefix=""):
-    def __init__(self, file_path):
-        self.file, self.writer = _get_file(file_path)
-        # self.s3_bucket = s3_bucket
-        # self.s3_key_prefix = s3_key_prefix
-        # self.s3_client = boto3.client('s3') if s3_bucket else None
+    def __init__(self, file_path, sync_rows=1, sync_interval=None, header=None, index_every=None):
+        """
+        Rows are group committed: written rows are flushed and fsynced together once sync_rows of them are pending,
+        or once the oldest pending row is sync_interval seconds old, whichever comes first. The defaults sync every row.
+        Pending rows are always synced by flush(), close() and set_file().
+
+        Args:
+            file_path: CSV file to append to. Its folder is created if needed.
+            sync_rows: most rows written between syncs.
+            sync_interval: most seconds a row waits to be synced, or None for no time limit.
+                           Only checked on writes and sync_if_due(), which should be called periodically.
+            header: row written first to files that are empty when opened, or None for no header.
+            index_every: keep a time index of the file (see timeindex.py) with a checkpoint every index_every rows,
+                         or None for no index. Only rows written with a timestamp are indexed.
+        """
+        self.path = file_path
+        self.header = header
+        self.index_every = index_every
+        self.file, self.writer = _get_file(file_path, header)
+        self.index = IndexWriter(file_path, index_every) if index_every else None
+        self.sync_rows = sync_rows
+        self.sync_interval = sync_interval
+        self.pending = 0  # rows written since the last sync
+        self.pending_since = None  # time.monotonic() of the oldest pending row
+        self.rows_written = 0
+        self.fsync_count = 0
 
     def close(self):
+        self.flush()
+        if self.index:
+            self.index.close(self.file.tell())
         self.file.close()
 
-    def write(self, data):
-        """Writes data to file with basic csv formatting. Flushes file buffer immediately after.
-           Also uploads the file to S3 if S3 is configured."""
+    def flush(self):
+        """Flush the file buffer and sync every pending row to disk."""
+        if self.pending:
+            self.file.flush()
+            fsync(self.file.fileno())
+            if self.index:
+                self.index.flush()  # after the rows it points to, the index can always be rebuilt so isn't synced
+            self.fsync_count += 1
+            self.pending = 0
+            self.pending_since = None
+
+    def sync_if_due(self):
+        """Sync pending rows if sync_rows of them are pending, or the oldest has waited sync_interval seconds or more."""
+        if self.pending and (self.pending >= self.sync_rows or (
+                self.sync_interval is not None and time.monotonic() - self.pending_since >= self.sync_interval)):
+            self.flush()
+
+    def _added(self, count):
+        if count:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending += count
+            self.rows_written += count
+            self.sync_if_due()
+
+    def write(self, data, timestamp=None):
+        """Writes data to file with basic csv formatting. Flushes file buffer and syncs when the group commit is due.
+           The row is indexed at timestamp (seconds since the epoch), if given."""
         
         # Write data to local file
+        if self.index and timestamp is not None:
+            self.index.add(timestamp, self.file.tell)
         self.writer.writerow(data)
         
-        # Flush file buffer
-        self.file.flush()
-        fsync(self.file.fileno())
-        
-        # Upload to S3 if S3 configuration is provided
-        # if self.s3_client:
-            # s3_key = f"{self.s3_key_prefix}/{self.file.name.split('/')[-1]}"
-            # try:
-                # self.s3_client.upload_file(self.file.name, self.s3_bucket, s3_key)
-                # print(f"Uploaded {self.file.name} to s3://{self.s3_bucket}/{s3_key}")
-            # except NoCredentialsError:
-                # print("AWS credentials not available for S3 upload.")
+        # Flush file buffer if enough rows are pending or the oldest has waited long enough
+        self._added(1)
+
+    def write_many(self, rows, timestamps=None):
+        """Writes every row in rows with basic csv formatting. Flushes file buffer at most once, after the last row.
+           Rows are indexed at the matching time in timestamps (seconds since the epoch), if given."""
+        writerow = self.writer.writerow
+        count = 0
+        if self.index and timestamps is not None:
+            add, tell = self.index.add, self.file.tell
+            for row, timestamp in zip(rows, timestamps):
+                add(timestamp, tell)
+                writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                writerow(row)
+                count += 1
+        self._added(count)
 
     def set_file(self, file_path):
         """Change the file this object will write to."""
         
-        self.close()  # Close the previous file
-        self.file, self.writer = _get_file(file_path)  # Open a new file and update the csvwriter
+        self.close()  # Sync and close the previous file
+        self.path = file_path
+        self.file, self.writer = _get_file(file_path, self.header)  # Open a new file and update the csvwriter
+        self.index = IndexWriter(file_path, self.index_every) if self.index_every else None
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import Counter
+from traceback import format_exc
+
+from basestationreader import ReadResult
+from multiportreader import MultiPortReader
+from reading import Reading, ReadingBatch
+
+
+class IngestWorker(threading.Thread):
+    def __init__(self, source: MultiPortReader, maxsize=10_000, idle_sleep=0.05):
+        """
+        Continuously drains the serial ports of a MultiPortReader on a background thread into a bounded buffer,
+        so slow consumers (plot gui loop, file writes) never delay reads from the serial ports.
+
+        Successful readings are collected column by column in a ReadingBatch. Everything else (connection changes,
+        BaseStation messages, errors) is kept as a list of events.
+
+        Args:
+            source: MultiPortReader to read from. Owned by the worker once started.
+            maxsize: maximum number of readings and events held between two get_batch() calls.
+                     Reads arriving while the buffer is full are dropped.
+            idle_sleep: longest time in seconds to wait for data before checking whether the worker was stopped.
+        """
+        super().__init__(name="IngestWorker", daemon=True)
+        self.source = source
+        self.maxsize = maxsize
+        self.idle_sleep = idle_sleep
+        self.dropped = 0  # number of reads discarded because the buffer was full
+        self.results = Counter()  # ReadResult -> number of reads with that status
+        self.sensor_readings = Counter()  # sensor id -> number of successful readings
+
+        self.port_index = {port: i for i, port in enumerate(source.readers)}
+        # two batches are swapped on every get_batch(), so neither is reallocated on long runs
+        self._batch, self._spare = ReadingBatch(source.readers), ReadingBatch(source.readers)
+        self._events = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._ready = threading.Event()  # set when reads are waiting to be consumed
+
+    @property
+    def depth(self):
+        """Number of readings and events waiting to be consumed."""
+        return len(self._batch) + len(self._events)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                reads = self.source.poll(self.idle_sleep)  # each read is timestamped when received
+            except Exception:
+                # keep the thread alive and hand the traceback to the consumer to be logged
+                message = f"Unexpected exception in ingest worker\n{format_exc()}"
+                reads = [(time.time(), None, Reading(ReadResult.CRITICAL, message))]
+                time.sleep(self.idle_sleep)
+
+            if not reads:
+                continue
+
+            with self._lock:
+                for received, port, reading in reads:
+                    self.results[reading.status] += 1
+                    if reading.status == ReadResult.SUCCESS:
+                        self.sensor_readings[reading.sensor_id] += 1
+                    if len(self._batch) + len(self._events) >= self.maxsize:
+                        self.dropped += 1
+                    elif reading.status == ReadResult.SUCCESS:
+                        try:
+                            self._batch.append(received, self.port_index[port], reading)
+                        except Exception:  # a reading that doesn't fit the batch mustn't stop the thread
+                            message = f"Could not buffer reading {reading.message}\n{format_exc()}"
+                            self._events.append((received, port, Reading(ReadResult.CRITICAL, message)))
+                    else:
+                        self._events.append((received, port, reading))
+                self._ready.set()
+
+        self.source.close()
+
+    def get_batch(self):
+        """
+        Return everything read since the last call, without blocking.
+
+        Returns:
+            (ReadingBatch, list of (float, str | None, Reading)):
+                ReadingBatch: the successful readings, oldest first. It is reused by the worker after the next call,
+                              so it must not be kept. <br>
+                list: the other reads as (time received in seconds since the epoch, port, Reading), oldest first.
+        """
+        with self._lock:
+            batch, events = self._batch, self._events
+            self._spare.clear()
+            self._batch, self._spare = self._spare, batch
+            self._events = []
+            self._ready.clear()
+        return batch, events
+
+    def wait(self, timeout=None):
+        """Wait until reads are waiting to be consumed, or timeout seconds. Returns whether they are."""
+        return self._ready.wait(timeout)
+
+    def stats(self):
+        """
+        Return a snapshot of the counters kept since the worker started.
+
+        Returns:
+            dict: "results": Counter of reads per ReadResult, "sensors": Counter of readings per sensor id,
+                  "reconnects": connections made after the first one, summed over every port,
+                  "dropped": reads discarded because the buffer was full.
+        """
+        with self._lock:
+            return {"results": Counter(self.results), "sensors": Counter(self.sensor_readings),
+                    "reconnects": sum(bsr.reconnects for bsr in self.source.readers.values()), "dropped": self.dropped}
+
+    def stop(self, timeout=None):
+        """Ask the worker to finish its current read, release the serial ports and exit."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,141 @@
+"""
+Structured event log: one JSON object per logged event, for searching what happened after the fact.
+
+    {"ts": 1737451962.25, "level": "WARNING", "result": "SUCCESS", "sensor": 7, "port": "/dev/ttyACM0",
+     "message": "sensor: 7, wheatstone voltage:  3.21000, ..."}
+
+ts is in seconds since the epoch; result, sensor and port are null for events that aren't about a read. Like the
+data logs, each events.jsonl gets a sparse time index sidecar (events.jsonl.idx, see timeindex.py), so searches
+only read the part of the file in their time range:
+
+    python jsonlog.py --start "2025-01-21 02:00" --end "2025-01-21 03:00" --level ERROR
+    python jsonlog.py --sensor 7 --result CRITICAL --format json
+"""
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime as dt
+from glob import glob
+from os import path
+
+from timeindex import IndexWriter, read_index
+
+EVENT_LOG_NAME = "events.jsonl"
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")  # level names, by increasing severity
+SLACK = 5.0  # most seconds an event can be logged after a later one (events of a batch are logged after the batch)
+
+
+class JsonLinesHandler(logging.Handler):
+    def __init__(self, file_path, level=logging.NOTSET, index_every=1000):
+        """
+        Writes records as JSON lines to file_path (appending), indexing them by time every index_every lines.
+        Read fields are taken from the record's event attribute, a dict set with extra={"event": {...}}:
+        ts (defaults to the record's time), result, sensor, port and message (defaults to the record's message).
+        """
+        super().__init__(level)
+        self.file = open(file_path, 'ab')
+        self.index = IndexWriter(file_path, index_every)
+
+    def emit(self, record):
+        try:
+            event = getattr(record, "event", None) or {}
+            result = event.get("result")
+            message = event.get("message")
+            line = json.dumps({
+                "ts": round(event.get("ts", record.created), 3),
+                "level": record.levelname,
+                "result": None if result is None else result.name,
+                "sensor": event.get("sensor"),
+                "port": event.get("port"),
+                "message": record.getMessage() if message is None else str(message),
+            }) + "\n"
+            self.index.add(event.get("ts", record.created), self.file.tell)
+            self.file.write(line.encode())
+            self.file.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        if not self.file.closed:
+            self.file.flush()
+            self.index.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.flush()
+            self.index.close(self.file.tell())
+            self.file.close()
+        super().close()
+
+
+def search(file_path, start=None, end=None, level=None, sensors=None, results=None, ports=None):
+    """
+    Yield the events of an event log with times in [start, end] (seconds since the epoch, None leaves that end open),
+    at least as severe as level, about one of sensors, with one of results (ReadResult names) and from one of ports.
+    Reading starts at the index checkpoint before start and stops once past end, so only about that range is read.
+    """
+    index = read_index(file_path)
+    if index is not None and not index.overlaps(None if start is None else start - SLACK, end):
+        return
+    min_level = LEVELS.index(level) if level else 0
+    with open(file_path, 'rb') as file:
+        if index is not None and start is not None:
+            file.seek(index.offset_for(start - SLACK))
+        for line in file:
+            try:
+                event = json.loads(line)
+                ts = event["ts"]
+            except (ValueError, KeyError):  # a line cut short by a crash
+                continue
+            if end is not None and ts > end + SLACK:
+                break
+            if ((start is None or ts >= start) and (end is None or ts <= end)
+                    and LEVELS.index(event["level"]) >= min_level
+                    and (sensors is None or event["sensor"] in sensors)
+                    and (results is None or event["result"] in results)
+                    and (ports is None or event["port"] in ports)):
+                yield event
+
+
+def find_event_logs(root):
+    """Find the event logs in root and every run folder under it, sorted (run folders are named by start time)."""
+    return sorted(glob(path.join(root, "**", EVENT_LOG_NAME), recursive=True))
+
+
+def format_event(event):
+    """Format an event like the console does."""
+    about = " ".join(f"{key}={event[key]}" for key in ("port", "sensor", "result") if event[key] is not None)
+    time_str = dt.fromtimestamp(event["ts"]).strftime("%m-%d-%Y %I:%M:%S %p")
+    return f"{time_str} {event['level']}: {event['message']}" + (f" [{about}]" if about else "")
+
+
+def main(argv=None):
+    from query import parse_datetime  # query imports NumPy, which Logger doesn't need
+
+    parser = argparse.ArgumentParser(prog="smartbricks logsearch", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="event logs or folders of them to search (default: logs)")
+    parser.add_argument("--start", type=parse_datetime, help="first time to search, local")
+    parser.add_argument("--end", type=parse_datetime, help="last time to search, local")
+    parser.add_argument("--level", choices=LEVELS, type=str.upper, help="least severe level shown")
+    parser.add_argument("--sensor", type=int, action="append", dest="sensors", help="sensor id, can be repeated")
+    parser.add_argument("--result", action="append", dest="results", type=str.upper,
+                        help="ReadResult name (SUCCESS, ERROR, CRITICAL, ...), can be repeated")
+    parser.add_argument("--port", action="append", dest="ports", help="port name, can be repeated")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="text, or json (one per line)")
+    args = parser.parse_args(argv)
+
+    file_paths = []
+    for file_path in args.paths or ["logs"]:
+        file_paths += find_event_logs(file_path) if path.isdir(file_path) else [file_path]
+    count = 0
+    for file_path in file_paths:
+        for event in search(file_path, args.start, args.end, args.level, args.sensors, args.results, args.ports):
+            print(json.dumps(event) if args.format == "json" else format_event(event))
+            count += 1
+    print(f"{count} events found in {len(file_paths)} event logs.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
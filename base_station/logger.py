@@ -1,9 +1,15 @@
 import enum
+import queue
+import threading
+import time
+from collections import OrderedDict
 from os import makedirs, path, fsync
 import logging # Not used in archived code
-from logging.handlers import RotatingFileHandler # Not used in archived code
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler # Not used in archived code
 from datetime import datetime # Not used in archived code
 
+from jsonlog import JsonLinesHandler
+
 class LogLevel(enum.IntEnum):
     """Used to tell the Logger how to handle a message."""
     DEBUG = 1
@@ -12,10 +18,62 @@ class LogLevel(enum.IntEnum):
     ERROR = WRITE_DEFAULT = 4
     CRITICAL = 5
 
+# logging module level of each LogLevel
+LOGGING_LEVELS = {LogLevel.DEBUG: logging.DEBUG, LogLevel.INFO: logging.INFO, LogLevel.WARNING: logging.WARNING,
+                  LogLevel.ERROR: logging.ERROR, LogLevel.CRITICAL: logging.CRITICAL}
+
+REPEATED_MSG = "Repeated %d more times in %.0f s: %s"  # summary of a message that was deduplicated
+
+class _Message:
+    """A message and its args, formatted when converted to a string."""
+
+    __slots__ = ("msg", "args")
+
+    def __init__(self, msg, args):
+        self.msg = msg
+        self.args = args
+
+    def __str__(self):
+        return str(self.msg) % self.args if self.args else str(self.msg)
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queues records as they are, so their messages are formatted by the listener's thread rather than the caller's."""
+
+    def prepare(self, record):
+        return record
+
 class Logger:
-    def __init__(self, file_path, print_level=LogLevel.PRINT_DEFAULT, write_level=LogLevel.WRITE_DEFAULT):
+    def __init__(self, file_path, print_level=LogLevel.PRINT_DEFAULT, write_level=LogLevel.WRITE_DEFAULT, stream=None,
+                 dedup_interval=None, max_keys=10_000, event_path=None, event_level=LogLevel.INFO):
+        """
+        Messages are queued, then formatted and written by a background thread, so a slow console or a log file
+        rotation never holds up the caller. Call close() to write every queued message before exiting.
+
+        Args:
+            file_path: log file, rotated at 5 MB.
+            print_level: messages with a level >= to this are printed.
+            write_level: messages with a level >= to this are written to the log file.
+            stream: where messages are printed, defaults to standard error.
+            dedup_interval: if set, a message logged again within dedup_interval seconds of its first occurrence is
+                            only counted, then summarized as "Repeated N more times in T s: <message>" when it is
+                            next logged after that, or by flush_repeats(). None logs every message.
+            max_keys: most messages remembered for deduplication. When there are more, expired ones are summarized
+                      and forgotten, then the oldest ones even if they haven't expired.
+            event_path: if set, messages are also written there as JSON lines, with the fields of their event
+                        (see log() and jsonlog.py).
+            event_level: messages with a level >= to this are written to event_path.
+        """
         self.print_level = print_level  # messages with a level >= to this will be printed
         self.write_level = write_level  # messages with a level >= to this will be written to the log file
+        self.min_level = min(print_level, write_level)  # messages below this are dropped without being formatted
+        if event_path:
+            self.min_level = min(self.min_level, event_level)
+        self.dedup_interval = dedup_interval
+        self.max_keys = max_keys
+        # key -> [time first logged, times repeated since, level, msg, args], oldest first
+        self._repeats = OrderedDict()
+        self._repeats_lock = threading.Lock()  # messages are logged from several threads (main loop, compressor, ...)
+        self.suppressed = 0  # number of messages deduplicated
 
         # Create log directory if it doesn't exist
         makedirs(path.dirname(file_path), exist_ok=True)
@@ -25,23 +83,65 @@ class Logger:
         # Set up the logging
         self.logger = logging.getLogger("SmartLogger")
         self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
 
         # File handler with rotation
         file_handler = RotatingFileHandler(file_path, maxBytes=5*1024*1024, backupCount=5)
         file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(file_formatter)
-        self.logger.addHandler(file_handler)
+        file_handler.setLevel(LOGGING_LEVELS[write_level])
 
         # Console handler
-        console_handler = logging.StreamHandler()
+        console_handler = logging.StreamHandler(stream)
         console_formatter = logging.Formatter('%(levelname)s: %(message)s')
         console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
-
-    # def close(self):
+        console_handler.setLevel(LOGGING_LEVELS[print_level])
+
+        # The handlers run on the listener's thread, the logger only queues records for it
+        self.handlers = [file_handler, console_handler]
+        if event_path:
+            self.handlers.append(JsonLinesHandler(event_path, LOGGING_LEVELS[event_level]))
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = _DeferredQueueHandler(self.queue)
+        self.logger.addHandler(self.queue_handler)
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def close(self):
+        """Write every queued message, then close the log file."""
         # self.file.close()
-
-    def log(self, msg, log_level):
+        self.flush_repeats(expired_only=False)
+        if self.listener is not None:
+            self.listener.stop()  # returns once the queue is drained
+            self.listener = None
+            self.logger.removeHandler(self.queue_handler)
+            for handler in self.handlers:
+                handler.flush()
+                handler.close()
+
+    def is_enabled(self, log_level):
+        """Check if a message with this level would be emitted, so callers can skip building messages that won't be."""
+        return log_level >= self.min_level
+
+    def flush_repeats(self, expired_only=True):
+        """Summarize the repeats of deduplicated messages whose interval is over (or of all of them), then forget them."""
+        with self._repeats_lock:
+            self._flush_repeats(time.monotonic(), expired_only)
+
+    def _flush_repeats(self, now, expired_only):
+        while self._repeats:
+            first = next(iter(self._repeats.values()))[0]
+            if expired_only and now - first < self.dedup_interval:
+                break  # the rest were first logged later
+            self._forget_oldest(now)
+
+    def _forget_oldest(self, now):
+        """Forget the oldest deduplicated message, summarizing its repeats."""
+        _, (first, count, log_level, msg, args) = self._repeats.popitem(last=False)
+        if count:
+            self.logger.log(LOGGING_LEVELS[log_level], REPEATED_MSG, count, now - first, _Message(msg, args))
+
+    def log(self, msg, log_level, *args, key=None, event=None):
         # prefix = "%-9s" % f"{log_level.name}:"
         # text = f"{prefix} {msg}"
 
@@ -54,31 +154,51 @@ class Logger:
         # self.file.flush()
         # fsync(self.file.fileno())
         
-        """Log a message with the appropriate severity."""
-        if log_level >= self.print_level:
-            if log_level == LogLevel.DEBUG:
-                self.logger.debug(msg)
-            elif log_level == LogLevel.INFO:
-                self.logger.info(msg)
-            elif log_level == LogLevel.WARNING:
-                self.logger.warning(msg)
-            elif log_level == LogLevel.ERROR:
-                self.logger.error(msg)
-            elif log_level == LogLevel.CRITICAL:
-                self.logger.critical(msg)
+        """Log a message with the appropriate severity. If args are given, the message is msg % args,
+           only formatted (on the listener's thread) if a handler emits it. msg can be any object, it is str()ed.
+           When deduplicating, messages with the same key are repeats. The key defaults to (level, msg, args),
+           pass one to leave out args that always change (e.g. the time).
+           event is a dict of the fields written to the event log: ts, result, sensor, port and message."""
+        if log_level < self.min_level:
+            return
+        if self.dedup_interval is not None:
+            key = (log_level, msg, args) if key is None else key
+            with self._repeats_lock:
+                now = time.monotonic()
+                try:
+                    repeat = self._repeats.get(key)
+                except TypeError:  # unhashable args, can't be deduplicated
+                    repeat = key = None
+                if repeat is not None:
+                    if now - repeat[0] < self.dedup_interval:
+                        repeat[1] += 1
+                        self.suppressed += 1
+                        return
+                    if repeat[1]:
+                        self.logger.log(LOGGING_LEVELS[repeat[2]], REPEATED_MSG, repeat[1], now - repeat[0],
+                                        _Message(repeat[3], repeat[4]))
+                if key is not None:
+                    if repeat is not None:
+                        del self._repeats[key]  # logged again, it is now the newest
+                    elif len(self._repeats) >= self.max_keys:
+                        self._flush_repeats(now, expired_only=True)
+                        while len(self._repeats) >= self.max_keys:
+                            self._forget_oldest(now)
+                    self._repeats[key] = [now, 0, log_level, msg, args]
+        self.logger.log(LOGGING_LEVELS[log_level], msg, *args, extra=None if event is None else {"event": event})
 
     # Convenience methods
-    def debug(self, msg):
-        self.log(msg, LogLevel.DEBUG)
+    def debug(self, msg, *args, key=None):
+        self.log(msg, LogLevel.DEBUG, *args, key=key)
 
-    def info(self, msg):
-        self.log(msg, LogLevel.INFO)
+    def info(self, msg, *args, key=None):
+        self.log(msg, LogLevel.INFO, *args, key=key)
 
-    def warn(self, msg):
-        self.log(msg, LogLevel.WARNING)
+    def warn(self, msg, *args, key=None):
+        self.log(msg, LogLevel.WARNING, *args, key=key)
 
-    def error(self, msg):
-        self.log(msg, LogLevel.ERROR)
+    def error(self, msg, *args, key=None):
+        self.log(msg, LogLevel.ERROR, *args, key=key)
 
-    def critical(self, msg):
-        self.log(msg, LogLevel.CRITICAL)
+    def critical(self, msg, *args, key=None):
+        self.log(msg, LogLevel.CRITICAL, *args, key=key)
@@ -1,119 +1,331 @@
+import argparse
+import signal
+from os import path, sep
 from datetime import datetime as dt, timedelta
 from math import floor
-from statistics import mean
 from traceback import format_exc
 from re import compile
-from collections import defaultdict
+from time import sleep
 
-import matplotlib # Added import to use matplotlib backend
-matplotlib.use('TkAgg') # Set the backend to TkAgg, which uses Tkinter
-
-from matplotlib.dates import DateFormatter, HourLocator, DayLocator
-import matplotlib.pyplot as plt # Ensure pyplot is imported
-
-from basestationreader import BaseStationReader, ReadResult
+from basestationreader import BaseStationReader, ReadMessage, ReadResult, DATA_MESSAGE
+from ingestworker import IngestWorker
+from multiportreader import MultiPortReader
+from portmanager import parse_port_spec
 from serialreaderwriter import SerialReaderWriter
-from csvwriter import CSVWriter
-from realtimeplotter import RealTimePlotter
+from csvwriter import CSVWriter, DATA_LOG_HEADER
+from binaryserieswriter import BinarySeriesWriter
+from segmentcompressor import SegmentCompressor
+from writerpool import WriterPool, SensorLimit
+from rollups import Rollups, ROLLUP_NAME, RESOLUTIONS
+from timeindex import SEGMENT_NAME
+from plotprocess import PlotProcess
 from logger import Logger, LogLevel
 
-start_time = last_plot_time = last_file_change_time = dt.now()
+start_time = last_file_change_time = last_status_time = dt.now()
 t_str = start_time.strftime("%m-%d-%Y %I:%M:%S %p")  # formatted time string
 
 FOLDER_PATH = f"./logs/{start_time.strftime('%m-%d-%Y_T%H-%M-%S')}"  # unique folder name
 ERROR_LOG_NAME = FOLDER_PATH + "/errors.log"
+EVENT_LOG_NAME = FOLDER_PATH + "/events.jsonl"  # the same messages as JSON lines, or None, see jsonlog.py
 DATA_LOG_NAME = FOLDER_PATH + "/day{i}-sensor{sensor}.csv"
+SERIES_LOG_NAME = FOLDER_PATH + "/day{i}-sensor{sensor}.bin"  # binary copy of the data log, see binaryserieswriter.py
 
-PLOT_UPDATE_INTERVAL = timedelta(minutes=1)  # down sampling interval for plot (to save memory)
+SNAPSHOT_NAME = FOLDER_PATH + "/plot.png"  # where the plot is saved when headless, unless --snapshot is given
+SNAPSHOT_INTERVAL = 60.0  # seconds between saves of the plot, when saving it
+LOOP_INTERVAL = 0.3  # seconds between iterations of the main loop while reading, readings wait in the ingest worker
 DATA_LOG_CHANGE_INTERVAL = timedelta(days=1)  # interval to rotate data log files (to minimize file size)
+STATUS_INTERVAL = timedelta(minutes=1)  # interval to report readings/sec per sensor, errors, reconnects and drops
+DEDUP_INTERVAL = 60  # seconds a logged message is collapsed into a "repeated N times" summary for, see Logger
+# durability window of data logs: rows are synced to disk in groups, at most CSV_SYNC_ROWS rows or
+# CSV_SYNC_INTERVAL seconds after they are written (to spare SD cards an fsync per reading)
+CSV_SYNC_ROWS = 500
+CSV_SYNC_INTERVAL = 2.0
+INDEX_EVERY = 1000  # rows between checkpoints of the data logs' time indexes, see timeindex.py
+
+# data logs of at most MAX_OPEN_WRITERS sensors are kept open at once (per format), others are reopened when needed.
+# Only sensor ids in ALLOWED_SENSORS (None for any) get data logs, and at most MAX_SENSORS of them,
+# so noisy or mis-parsed ids can't exhaust file descriptors or memory
+MAX_OPEN_WRITERS = 128
+ALLOWED_SENSORS = None
+MAX_SENSORS = 1024
+REJECTED_MSG = "Ignoring readings from sensor {sensor}: not allowed, or more than {limit} sensors"
+
+# where data logs are copied to as they are written, or None to not upload them, e.g. "s3://smartbricksbucket",
+# "http://localhost:8000" (see `python uploader.py serve`) or a folder. See uploader.py
+UPLOAD_URL = None
+UPLOAD_RATE = 64 * 1024  # most bytes uploaded per second
+UPLOAD_JOURNAL = "./logs/upload-journal.json"  # shared by every run, so uploads resume after a restart
 
 V_LOW, V_HIGH = 0.15, 3.15  # good voltage range
-voltages_to_plot = defaultdict(list)  # buffer voltages between plot times
 
-DATA_LOG_HEADER = ["Time (mm-dd-yyyy H:M:S)", "Time (.1s Delta)", "Wheatstone Voltage (V)", "Range", "Log Amp Voltage", "Battery Voltage"]
 file_count = 1
 
-CONSOLE_MSG = "{time} | {message}"  # format for console messages
+parser = argparse.ArgumentParser(description="Reads, logs and plots the readings of SmartBricks BaseStations.")
+parser.add_argument("ports", nargs="*", default=["/dev/ttyACM0"],
+                    help="port of every BaseStation to read, by name or USB vid:pid[:serial number], "
+                         "e.g. `python main.py /dev/ttyACM0 usb:239a:800c:ABC123` (default: /dev/ttyACM0)")
+parser.add_argument("--headless", action="store_true",
+                    help="run as a service, without a display: no plot window (the plot is saved as an image "
+                         "instead, see --snapshot) and no waiting for ENTER on exit")
+parser.add_argument("--snapshot", help="image the plot is saved to, .png or .svg "
+                                       "(default when headless: plot.png in the run folder)")
+parser.add_argument("--snapshot-interval", type=float, default=SNAPSHOT_INTERVAL,
+                    help=f"seconds between saves of the plot (default: {SNAPSHOT_INTERVAL:.0f})")
+args = parser.parse_args()
+
+SERIAL_PORTS = args.ports
+try:
+    PORT_SPECS = {spec: parse_port_spec(spec) for spec in SERIAL_PORTS}  # spec -> (device name, USB match)
+except ValueError as e:
+    parser.error(str(e))
+HEADLESS = args.headless
+
+CONSOLE_MSG = "%s | %s"  # format for console messages: time, message
+PORT_MSG = "%s | %s: %s"  # format for messages about a specific port, when reading several: time, port, message
 DATA_PATTERN = compile(r"(\d+)\s+(\d+(?:\.\d+)?)\s+(\d)\s+(\d+(?:\.\d+)?)\s+(\d+(?:\.\d+)?)")  # match int float int float float | <sensor id> <wheatstone voltage> <range> <log amp voltage> <battery voltage>
 
-p = RealTimePlotter(xstart=start_time, xrange=timedelta(hours=24), yrange=[0, 3.3],
-                    title="Voltage vs. Time", xlabel="Time", ylabel="Voltage (V)", solid_lines=(V_LOW, V_HIGH),
-                    x_minor_locator=HourLocator(interval=4), x_minor_formatter=DateFormatter("%I:%M %p"),
-                    x_major_locator=DayLocator(interval=1), x_major_formatter=DateFormatter("\n%m-%d-%Y"))
+# the plot runs in its own process, fed through shared memory, so drawing it never delays reads (see plotprocess.py).
+# This process never imports matplotlib, so it starts reading right away
+plot = PlotProcess(xstart=start_time, xrange=timedelta(hours=24), yrange=[0, 3.3],
+                   title="Voltage vs. Time", xlabel="Time", ylabel="Voltage (V)", solid_lines=(V_LOW, V_HIGH),
+                   headless=HEADLESS, snapshot_path=args.snapshot or (SNAPSHOT_NAME if HEADLESS else None),
+                   snapshot_interval=args.snapshot_interval)
+
+
+
+# only fall back to another port when reading a single BaseStation, otherwise readers could steal each other's ports
+readers = {}
+for spec, (port, match) in PORT_SPECS.items():
+    readers[spec] = BaseStationReader(SerialReaderWriter(port, 9600, timeout=360, fallback=len(SERIAL_PORTS) == 1, match=match),
+                                      DATA_PATTERN, timeout=timedelta(seconds=360))
+worker = IngestWorker(MultiPortReader(readers))
+# errors.log keeps readings, as the console does
+logger = Logger(ERROR_LOG_NAME, write_level=LogLevel.INFO, dedup_interval=DEDUP_INTERVAL, event_path=EVENT_LOG_NAME)
+# compresses the previous day's data logs after rotation (once uploaded, if uploading), off the ingest loop
+compressor = SegmentCompressor(on_error=lambda file_path, error: logger.error("Could not compress %s\n%s", file_path, error))
+
+
+def compress_data_log(file_path):
+    """Compress an uploaded file if it is a data log. Rollups stay uncompressed, as read_rollups reads them."""
+    if SEGMENT_NAME.search(path.basename(file_path)):
+        compressor.submit(file_path)
+
+
+uploader = None
+if UPLOAD_URL:
+    from uploader import Uploader, make_target  # urllib and http only need to be imported when uploading
+
+    uploader = Uploader(make_target(UPLOAD_URL), UPLOAD_JOURNAL, rate_limit=UPLOAD_RATE,
+                        on_error=lambda error: logger.error("Upload failed, retrying\n%s", error),
+                        on_finished=compress_data_log)
+
+
+def upload_key(file_path):
+    """Name of an uploaded log: its run folder and file name."""
+    return "/".join(path.normpath(file_path).split(sep)[-2:])
+
+
+def close_segment(file_path):
+    """Hand a data log that won't be written to again to the uploader, which compresses it after, or the compressor."""
+    if uploader:
+        uploader.close_file(file_path, upload_key(file_path))
+    else:
+        compressor.submit(file_path)
+
+
+# per minute, hour and day rollups of every sensor, see rollups.py
+rollups = Rollups(FOLDER_PATH)
+rollup_paths = [path.join(FOLDER_PATH, ROLLUP_NAME.format(resolution=name)) for name in RESOLUTIONS]
+
+
+def open_writer(sensor):
+    """Open a CSVWriter on the current data log of the given sensor. Only new files get the header."""
+    writer = CSVWriter(DATA_LOG_NAME.format(sensor=sensor, i=file_count), header=DATA_LOG_HEADER,
+                       sync_rows=CSV_SYNC_ROWS, sync_interval=CSV_SYNC_INTERVAL, index_every=INDEX_EVERY)
+    if uploader:
+        uploader.track(writer.path, upload_key(writer.path))
+    return writer
+
 
+def open_series_writer(sensor):
+    """Open a BinarySeriesWriter on the current binary data log of the given sensor."""
+    return BinarySeriesWriter(SERIES_LOG_NAME.format(sensor=sensor, i=file_count), start_time,
+                              sync_rows=CSV_SYNC_ROWS, sync_interval=CSV_SYNC_INTERVAL)
 
 
-bsr = BaseStationReader(SerialReaderWriter("/dev/ttyACM0", 9600, timeout=360), DATA_PATTERN, timeout=timedelta(seconds=360))
-writers = {}
-logger = Logger(ERROR_LOG_NAME)
+writers = WriterPool(open_writer, max_open=MAX_OPEN_WRITERS)
+series_writers = WriterPool(open_series_writer, max_open=MAX_OPEN_WRITERS)
+sensor_limit = SensorLimit(ALLOWED_SENSORS, MAX_SENSORS)
 
 
-def write(sensor, data):
-    """Write data to the CSV file associated with the given sensor.
-    Make a new CSVWriter, with header, if one does not already exist."""
-    if sensor not in writers:
-        # writers[sensor] = CSVWriter(DATA_LOG_NAME.format(sensor=sensor, i=file_count), s3_bucket='smartbricksbucket', s3_key_prefix="")
-        writers[sensor] = CSVWriter(DATA_LOG_NAME.format(sensor=sensor, i=file_count))
-        writers[sensor].write(DATA_LOG_HEADER)  # start new CSVWriters with the header
+_time_cache = [None, ""]  # [whole second, formatted string], readings mostly arrive within the same second
 
-    writers[sensor].write(data)
+
+def format_time(timestamp):
+    """Format a time in seconds since the epoch like "%m-%d-%Y %I:%M:%S %p"."""
+    second = int(timestamp)
+    if second != _time_cache[0]:
+        _time_cache[0], _time_cache[1] = second, dt.fromtimestamp(second).strftime("%m-%d-%Y %I:%M:%S %p")
+    return _time_cache[1]
+
+
+def log_read(received, port, message, level, result=None, sensor=None):
+    """Log a message about a read, prefixed with the time it was received (and its port, when reading several)."""
+    if logger.is_enabled(level):  # messages are only formatted once they are known to be emitted, by the logger
+        event = {"ts": received, "result": result, "sensor": sensor, "port": port, "message": message}
+        # the time is left out of the key, so a message repeated over and over is collapsed into a summary
+        if len(SERIAL_PORTS) > 1 and port:
+            logger.log(PORT_MSG, level, format_time(received), port, message, key=(level, port, message), event=event)
+        else:
+            logger.log(CONSOLE_MSG, level, format_time(received), message, key=(level, message), event=event)
+
+
+def log_now(message, level):
+    """Log a message that isn't about a read, prefixed with the current time (in the event log, only its ts is)."""
+    logger.log(CONSOLE_MSG, level, t_str, message, event={"message": message})
+
+
+def process_batch(batch):
+    """Buffer, write and log every successful reading in a ReadingBatch, one sensor at a time."""
+    start_ts = start_time.timestamp()
+    ts, v, r, lv, bv = batch.timestamp, batch.voltage, batch.mrange, batch.logvoltage, batch.batvoltage
+    rejected = set()  # sensors whose readings are ignored, not even logged
+    for sensor_id, rows in batch.rows_by_sensor().items():
+        if not sensor_limit.admit(sensor_id, len(rows)):
+            rejected.add(sensor_id)
+            if sensor_limit.rejected[sensor_id] == len(rows):  # first readings rejected
+                log_read(ts[rows[0]], batch.port_name(rows[0]),
+                         REJECTED_MSG.format(sensor=sensor_id, limit=MAX_SENSORS), LogLevel.WARNING, sensor=sensor_id)
+            continue
+        timestamps = [ts[i] for i in rows]
+        rollups.add_many(sensor_id, timestamps, [(v[i], lv[i], bv[i]) for i in rows])
+        writers.get(sensor_id).write_many(
+            ([format_time(ts[i]), floor((ts[i] - start_ts) * 10), "%.5f" % v[i], r[i], "%.5f" % lv[i], "%.5f" % bv[i]]
+             for i in rows), timestamps)
+        series_writers.get(sensor_id).write_many((ts[i], v[i], r[i], lv[i], bv[i]) for i in rows)
+        # every reading is plotted, excursions included: the plot draws their min/max per pixel (see plotter.py)
+        for i in rows:
+            plot.plot(ts[i], v[i], sensor_id)
+
+    out_of_range = set(batch.out_of_range(V_LOW, V_HIGH))
+    to_log = range(len(batch)) if logger.is_enabled(LogLevel.INFO) else sorted(out_of_range)
+    if rejected:
+        to_log = [i for i in to_log if batch.sensor_id[i] not in rejected]
+    for i in to_log:
+        message = ReadMessage(DATA_MESSAGE, batch.sensor_id[i], v[i], r[i], lv[i], bv[i])
+        log_read(ts[i], batch.port_name(i), message, LogLevel.WARNING if i in out_of_range else LogLevel.INFO,
+                 ReadResult.SUCCESS, batch.sensor_id[i])
+
+
+def consume():
+    """Log and store everything read since the last call, using the time each line was received. Returns the batch."""
+    batch, events = worker.get_batch()
+    for received, port, reading in events:
+        log_read(received, port, reading.message, LogLevel(int(reading.status)), reading.status, reading.sensor_id)
+    process_batch(batch)
+    return batch
+
+
+def status_message(before, after, seconds):
+    """Summarize the change between two IngestWorker.stats() snapshots taken seconds apart."""
+    readings = after["sensors"] - before["sensors"]
+    results = after["results"] - before["results"]
+    rates = ", ".join(f"{sensor_id}: {count / seconds:.2f}" for sensor_id, count in sorted(readings.items()))
+    return (f"Readings/sec by sensor: {rates or 'none'} | errors: {results[ReadResult.ERROR]}, "
+            f"unknown lines: {results[ReadResult.CRITICAL]}, reconnects: {after['reconnects'] - before['reconnects']}, "
+            f"repeats suppressed: {logger.suppressed} | ingest queue depth: {worker.depth}, "
+            f"dropped: {after['dropped'] - before['dropped']} | "
+            f"points not plotted (more sensors than the plot has slots for): {plot.rejected}")
 
 
 def cleanup():
     """Close resources and wait for user to exit the program."""
-    logger.info("The program has ended. Press ENTER to close the window.")
-    bsr.close()
-    for w in writers.values():
-        w.close()
+    logger.info("The program has ended." if HEADLESS else "The program has ended. Press ENTER to close the window.")
+    worker.stop(timeout=1)  # worker releases the serial ports on exit
+    try:
+        consume()  # what was read since the last iteration, before the data logs are closed
+    except Exception:
+        logger.critical(format_exc())
+    series_writers.close()
+    rollups.close()
+    if uploader:
+        for closed_path in [*writers.rotate(), *rollup_paths]:  # the next run finishes uploading what this one couldn't
+            uploader.close_file(closed_path, upload_key(closed_path))
+        uploader.stop(timeout=2)
+    else:
+        writers.close()
+    compressor.stop(timeout=5)  # segments left uncompressed can be compressed later with segmentcompressor.py
     logger.close()
-    input()  # wait for user to press ENTER to close the window
+    if not HEADLESS:
+        input()  # wait for user to press ENTER to close the window
+    plot.close()  # closes the window, after a final snapshot when saving them
+
+
+def handle_signal(signum, frame):
+    """Stop on termination signals the same way as on CTRL+C, so pending data log rows are synced."""
+    raise KeyboardInterrupt
 
 
-logger.info(CONSOLE_MSG.format(time=t_str, message="Listening for BaseStation..."))
+signal.signal(signal.SIGTERM, handle_signal)
+if hasattr(signal, "SIGHUP"):  # not on Windows
+    signal.signal(signal.SIGHUP, handle_signal)
 
-while True:  # read data from serial connection continuously
+log_now("Listening for BaseStation...", LogLevel.INFO)
+worker.start()
+last_stats = worker.stats()
+compressor.start()
+plot.start()
+if uploader:
+    for rollup_path in rollup_paths:
+        uploader.track(rollup_path, upload_key(rollup_path))
+    uploader.start()
+
+while True:  # consume data read by the ingest worker continuously
     try:
+        batch = consume()  # everything read since the last iteration
+        for writer in [*writers.writers(), *series_writers.writers()]:
+            writer.sync_if_due()  # keep rows within the durability window when readings stop arriving
+
         now = dt.now()  # get current time as datetime
         t_str = now.strftime("%m-%d-%Y %I:%M:%S %p")  # formatted time string
-        t_delta = floor((now - start_time).total_seconds() * 10)  # time delta in tenths of seconds
-
-        # read data and log appropriately
-        sensor_id, voltage, mrange, logvoltage, batvoltage, message, status = bsr.read()
-        message = CONSOLE_MSG.format(time=t_str, message=message)
-        if status == ReadResult.SUCCESS:
-            voltages_to_plot[sensor_id].append(voltage)
-            logger.info(message) if V_LOW <= voltage <= V_HIGH else logger.warn(message)
-            write(sensor_id, [t_str, t_delta, "%.5f" % voltage, mrange, "%.5f" % logvoltage, "%.5f" % batvoltage])
-        else:
-            logger.log(message, LogLevel(int(status)))
 
-        # if PLOT_UPDATE_INTERVAL has passed and there are unprocessed measurements, plot the average
-        if now - last_plot_time >= PLOT_UPDATE_INTERVAL:
-            last_plot_time = now
-            for sensor_id, voltages in voltages_to_plot.items():
-                if voltages:
-                    p.plot(now, mean(voltages), f"sensor{sensor_id}")
-                    voltages.clear()
+        # if STATUS_INTERVAL has passed, report what was read since the last report and how far behind the consumer is
+        if now - last_status_time >= STATUS_INTERVAL:
+            stats = worker.stats()
+            status_msg = status_message(last_stats, stats, (now - last_status_time).total_seconds())
+            troubled = stats["dropped"] > last_stats["dropped"] or stats["results"][ReadResult.ERROR] > last_stats["results"][ReadResult.ERROR]
+            log_now(status_msg, LogLevel.WARNING if troubled else LogLevel.INFO)
+            logger.flush_repeats()  # summarize messages that stopped repeating
+            last_status_time, last_stats = now, stats
+
+        # close the rollup buckets of sensors that stopped reporting
+        rollups.close_due()
+        rollups.sync_if_due()
 
         # if FILE_CHANGE_INTERVAL has passed, switch to a new file
         if now - last_file_change_time >= DATA_LOG_CHANGE_INTERVAL:
             file_count += 1
             last_file_change_time = now
-            for s_id, writer in writers.items():
-                writer.set_file(DATA_LOG_NAME.format(sensor=s_id, i=file_count))
+            # writers are reopened on the new files as readings arrive, rather than all at once
+            for closed_path in writers.rotate():
+                close_segment(closed_path)
+            series_writers.rotate()
 
-        p.update(.3)  # run plot's gui loop to keep window responsive (less than SEARCH_TIMEOUT = .5s)
+        if len(batch):
+            sleep(LOOP_INTERVAL)  # let readings accumulate, to process them in batches
+        else:
+            worker.wait(LOOP_INTERVAL)  # idle, process the next readings as soon as they arrive
 
     except KeyboardInterrupt:
         # KeyboardInterrupt is triggered when user presses CTRL+C. This is a shortcut to end running console programs.
-        logger.critical(CONSOLE_MSG.format(time=t_str, message="Trapped CTRL+C -- Closing Program"))
+        log_now("Trapped CTRL+C -- Closing Program", LogLevel.CRITICAL)
         cleanup()
         exit(1)
 
     except (FileNotFoundError, PermissionError):
-        logger.critical(CONSOLE_MSG.format(time=t_str, message="File Access Error"))
+        log_now("File Access Error", LogLevel.CRITICAL)
         logger.critical(format_exc())
 
     except Exception:
-        logger.critical(CONSOLE_MSG.format(time=t_str, message="Unexpected Exception"))
+        log_now("Unexpected Exception", LogLevel.CRITICAL)
         logger.critical(format_exc())
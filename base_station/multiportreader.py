@@ -0,0 +1,89 @@
+import selectors
+import time
+
+from basestationreader import BaseStationReader, IDLE_READINGS
+
+
+class MultiPortReader:
+    def __init__(self, readers: dict, check_interval=1.0, max_lines=100):
+        """
+        Reads several BaseStationReaders from one thread, waiting on all of their serial ports at once with a selector.
+
+        Args:
+            readers: BaseStationReader for each port, keyed by the name its readings should be tagged with.
+            check_interval: seconds between polls of a port that isn't reporting, so disconnects, reconnects and
+                            timeouts are still handled.
+            max_lines: most lines read from one port per poll, so one busy port can't starve the others.
+        """
+        self.readers = readers
+        self.check_interval = check_interval
+        self.max_lines = max_lines
+        self.selector = selectors.DefaultSelector()
+        self.fds = {}  # port -> registered file descriptor
+        self.last_poll = {port: 0.0 for port in readers}
+
+    def _fileno(self, bsr: BaseStationReader):
+        """The file descriptor behind a connected reader, or None if it can't be waited on (e.g. on Windows)."""
+        try:
+            return bsr.reader.ser.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def _update_registration(self, port):
+        """Watch the port's file descriptor while it is connected, and stop watching it once it isn't."""
+        bsr = self.readers[port]
+        connected = bsr.reader.is_connected()
+        if port in self.fds and not connected:
+            self.selector.unregister(self.fds.pop(port))
+        elif port not in self.fds and connected:
+            fd = self._fileno(bsr)
+            if fd is not None:
+                self.selector.register(fd, selectors.EVENT_READ, port)
+                self.fds[port] = fd
+
+    def _drain(self, port, results):
+        """Read from one port until it has nothing left (or max_lines is reached), tagging results with the port."""
+        bsr = self.readers[port]
+        self.last_poll[port] = time.monotonic()
+        for _ in range(self.max_lines):
+            reading = bsr.read()
+            if reading in IDLE_READINGS:
+                break
+            results.append((time.time(), port, reading))
+            if not bsr.pending and port in self.fds:
+                break  # the selector will report when more arrives
+        self._update_registration(port)
+
+    def poll(self, timeout):
+        """
+        Wait up to timeout seconds for any port to have data, then read everything available.
+
+        Returns:
+            list of (float, str, Reading): time each line was received (seconds since the epoch),
+            the port it came from, and the result of BaseStationReader.read().
+        """
+        now = time.monotonic()
+        due = {port for port, bsr in self.readers.items()
+               if bsr.pending  # lines already pulled off the port
+               or (bsr.reader.is_connected() and port not in self.fds)  # connected, but can't be waited on
+               or now - self.last_poll[port] >= self.check_interval}  # reconnects and timeouts
+
+        if self.fds:
+            # ports that need polling anyway shouldn't wait on the selector
+            wait = 0 if due else timeout
+            due.update(key.data for key, _ in self.selector.select(wait))
+
+        results = []
+        for port in due:
+            self._drain(port, results)
+
+        if not results and not self.fds:
+            time.sleep(timeout)  # nothing can be waited on, avoid spinning
+        return results
+
+    def close(self):
+        for port in list(self.fds):
+            self.selector.unregister(self.fds.pop(port))
+        self.selector.close()
+        for bsr in self.readers.values():
+            bsr.close()
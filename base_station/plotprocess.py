@@ -0,0 +1,248 @@
+"""
+Runs the live plot in its own process, so drawing it (or dragging, closing or crashing its window) never delays
+reading the BaseStations or writing the logs.
+
+The ingest side publishes points into a shared memory block holding a ring buffer per sensor, which the plot process
+reads in place: nothing is pickled or sent through a pipe. The block holds, as 8 byte numbers:
+    a header: stop flag, unused
+    the sensor id of each slot (-1 if unused)
+    the number of points ever written to each slot
+    slots rings of capacity (seconds since the epoch, value) points
+There is one writer and one reader: a point is written before its slot's count is incremented, so the reader only
+reads complete points.
+
+PlotProcess starts the plot process as `python plotprocess.py <shared memory name> <settings>`. It exits when its
+window is closed, when the stop flag is set, or when its standard input closes, e.g. as the ingest process exited.
+Headless, it has no window and uses the Agg backend (no Tk), saving the plot as an image at intervals instead.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime as dt, timedelta
+from multiprocessing import resource_tracker, shared_memory
+
+HEADER_SIZE = 2
+
+
+class PointRings:
+    def __init__(self, slots=64, capacity=4096, name=None):
+        """
+        Ring buffers of points per sensor in shared memory. Accessed through memoryviews rather than NumPy arrays,
+        so publishing doesn't slow down the ingest process' start by importing NumPy.
+
+        Args:
+            slots: most sensors published.
+            capacity: points kept per sensor, older ones are overwritten.
+            name: name of the shared memory block to attach to (in the reader), or None to create one.
+        """
+        self.slots = slots
+        self.capacity = capacity
+        size = 8 * (HEADER_SIZE + 2 * slots + 2 * slots * capacity)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        self._views = []  # every view of the block, released before it is closed
+        self.header = self._view(0, HEADER_SIZE, 'q')
+        self.ids = self._view(HEADER_SIZE, slots, 'q')
+        self.counts = self._view(HEADER_SIZE + slots, slots, 'q')
+        # timestamp, value of point i of slot s at 2 * (s * capacity + i)
+        self.points = self._view(HEADER_SIZE + 2 * slots, 2 * slots * capacity, 'd')
+        if name is None:
+            self.header[0] = 0
+            for slot in range(slots):
+                self.ids[slot] = -1
+                self.counts[slot] = 0
+
+        self.slot_of = {}  # writer: sensor id -> slot
+        self.read = [0] * slots  # reader: points of each slot read so far
+
+    def _view(self, start, length, fmt):
+        """View length 8 byte numbers of the block from the start-th on, as fmt ('q' for int64, 'd' for float64)."""
+        view = self.shm.buf[8 * start:8 * (start + length)]
+        self._views += [view, view.cast(fmt)]
+        return self._views[-1]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def stopped(self):
+        return bool(self.header[0])
+
+    def stop(self):
+        self.header[0] = 1
+
+    def publish(self, sensor_id, timestamp, value):
+        """Add a point of a sensor. Returns False if every slot is taken by other sensors."""
+        slot = self.slot_of.get(sensor_id)
+        if slot is None:
+            if len(self.slot_of) == self.slots:
+                return False
+            slot = self.slot_of[sensor_id] = len(self.slot_of)
+            self.ids[slot] = sensor_id
+        count = self.counts[slot]
+        i = 2 * (slot * self.capacity + count % self.capacity)
+        self.points[i] = timestamp
+        self.points[i + 1] = value
+        self.counts[slot] = count + 1
+        return True
+
+    def read_new(self):
+        """
+        Yield (sensor id, points) of each sensor with points added since the last call. points is a memoryview of
+        timestamp, value, timestamp, value, ...
+        """
+        for slot in range(self.slots):
+            count, last = self.counts[slot], self.read[slot]
+            if count == last:
+                continue
+            first = max(last, count - self.capacity)  # points overwritten before they were read are skipped
+            self.read[slot] = count
+            start, n = first % self.capacity, count - first
+            base = 2 * slot * self.capacity
+            sensor_id = self.ids[slot]
+            if start + n <= self.capacity:
+                yield sensor_id, self.points[base + 2 * start:base + 2 * (start + n)]
+            else:  # wraps around the end of the ring
+                yield sensor_id, self.points[base + 2 * start:base + 2 * self.capacity]
+                yield sensor_id, self.points[base:base + 2 * (start + n - self.capacity)]
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()  # views must be released before the block is closed
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _attach(name):
+    """Attach to a block created by another process, which is responsible for removing it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":  # otherwise this process' resource tracker would remove it as this process exits
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class PlotProcess:
+    def __init__(self, xstart, xrange, yrange, title, xlabel, ylabel, solid_lines=(), slots=64, capacity=4096,
+                 interval=0.3, headless=False, snapshot_path=None, snapshot_interval=60.0):
+        """
+        The RealTimePlotter of main.py, run in its own process. Points are published with plot().
+
+        Args:
+            xstart: datetime the plot starts at. xrange: timedelta shown.
+            yrange, title, xlabel, ylabel, solid_lines: as for RealTimePlotter.
+            slots, capacity: see PointRings.
+            interval: seconds between reads of new points, the plot's GUI loop runs in between.
+            headless: plot without a window, e.g. on a computer without a display.
+            snapshot_path: if set, the plot is saved there (.png, .svg, ...) every snapshot_interval seconds it
+                           changed, and when it closes.
+        """
+        self.rings = PointRings(slots, capacity)
+        self.settings = dict(xstart=xstart.timestamp(), xrange=xrange.total_seconds(), yrange=list(yrange),
+                             title=title, xlabel=xlabel, ylabel=ylabel, solid_lines=list(solid_lines),
+                             slots=slots, capacity=capacity, interval=interval, headless=headless,
+                             snapshot_path=snapshot_path and os.path.abspath(snapshot_path),
+                             snapshot_interval=snapshot_interval)
+        self.process = None
+        self.rejected = 0  # points not published because every slot was taken, reported in main.py's status
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), self.rings.name,
+                                         json.dumps(self.settings)], stdin=subprocess.PIPE)
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def plot(self, timestamp, value, sensor_id):
+        """Publish a point of a sensor, at timestamp in seconds since the epoch. Never blocks."""
+        if not self.rings.publish(sensor_id, timestamp, value):
+            self.rejected += 1
+
+    def close(self, timeout=2.0):
+        """Stop the plot process (closing its window) and remove the shared memory."""
+        self.rings.stop()
+        if self.process is not None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.rings.close()
+        self.rings.unlink()
+
+
+def run_plot(name, settings):
+    """Plot the points published in the shared memory block name until stopped, or the window is closed."""
+    # a CTRL+C in the terminal, or a service manager stopping the group, also reaches this process: ignore it and let
+    # the ingest process stop it (stop flag, or standard input closing), so the last points and snapshot are saved
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_IGN)
+    import matplotlib  # only the plot process needs a GUI
+    matplotlib.use('Agg' if settings["headless"] else 'TkAgg')  # TkAgg uses Tkinter, Agg only draws images
+    import matplotlib.pyplot as plt
+    from matplotlib.dates import DateFormatter, HourLocator, DayLocator
+
+    from realtimeplotter import RealTimePlotter
+
+    parent_gone = threading.Event()
+
+    def watch_parent():
+        sys.stdin.read()  # returns once the ingest process closes its end, or exits
+        parent_gone.set()
+
+    threading.Thread(target=watch_parent, daemon=True).start()
+
+    p = RealTimePlotter(xstart=dt.fromtimestamp(settings["xstart"]), xrange=timedelta(seconds=settings["xrange"]),
+                        yrange=settings["yrange"], title=settings["title"], xlabel=settings["xlabel"],
+                        ylabel=settings["ylabel"], solid_lines=settings["solid_lines"],
+                        x_minor_locator=HourLocator(interval=4), x_minor_formatter=DateFormatter("%I:%M %p"),
+                        x_major_locator=DayLocator(interval=1), x_major_formatter=DateFormatter("\n%m-%d-%Y"))
+    rings = PointRings(settings["slots"], settings["capacity"], name)  # once nothing before the try can fail
+
+    def plot_new():
+        """Plot the points published since the last call. Returns whether there were any."""
+        new = False
+        for sensor_id, points in rings.read_new():
+            points = points.tolist()
+            for timestamp, value in zip(points[::2], points[1::2]):
+                p.plot(dt.fromtimestamp(timestamp), value, f"sensor{sensor_id}")
+            new = True
+        return new
+
+    headless, snapshot_path = settings["headless"], settings["snapshot_path"]
+    changed = False  # points were plotted since the last snapshot
+    next_snapshot = time.monotonic() + settings["snapshot_interval"]
+    try:
+        while not (rings.stopped or parent_gone.is_set()) and (headless or plt.fignum_exists(p.fig.number)):
+            changed |= plot_new()
+            if snapshot_path and changed and time.monotonic() >= next_snapshot:
+                p.save(snapshot_path)  # only the lines that changed are drawn again, see Plotter
+                changed = False
+                next_snapshot = time.monotonic() + settings["snapshot_interval"]
+            if headless:
+                parent_gone.wait(settings["interval"])
+            else:
+                p.update(settings["interval"])  # run plot's gui loop to keep window responsive
+        changed |= plot_new()  # the last points published before stopping
+        if snapshot_path and changed:
+            p.save(snapshot_path)
+    finally:
+        plt.close("all")
+        rings.close()
+
+
+if __name__ == "__main__":
+    run_plot(sys.argv[1], json.loads(sys.argv[2]))
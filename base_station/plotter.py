@@ -1,20 +1,140 @@
+from math import ceil
+from os import path, replace
+
 import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.image import imsave
+
+
+def min_max_envelope(x, y, width):
+    """
+    Reduce points to their min and max in each column of x of the given width, in the order they occur, so a line
+    through them looks the same as through every point when a column is a pixel wide, spikes included.
+
+    Returns:
+        (x, y, tail, split): the envelope's points, the index of the first point of the last column in the input,
+                             and of the envelope of the last column in the output.
+    """
+    if not len(x):
+        return x, y, 0, 0
+    columns = np.floor(x / width).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    ends = np.r_[starts[1:], len(x)]
+    segment = np.repeat(np.arange(len(starts)), ends - starts)
+    order = np.lexsort((y, segment))  # by column, then y: the first of each column is its min, the last its max
+    low, high = order[starts], order[ends - 1]
+    first, second = np.minimum(low, high), np.maximum(low, high)
+    points = np.column_stack((first, second)).ravel()
+    points = points[np.column_stack((np.ones(len(first), bool), second != first)).ravel()]  # columns of one point
+    split = len(points) - (1 if second[-1] == first[-1] else 2)
+    return x[points], y[points], starts[-1], split
 
 
 class Line:
-    def __init__(self, xdata, ydata, line):
-        self.xdata = xdata
-        self.ydata = ydata
+    def __init__(self, capacity, line):
+        """
+        The points of a plotted line, in a fixed-capacity ring buffer: once full, adding a point drops the oldest one.
+        Every point is stored twice, capacity apart, so the points are always a contiguous slice (no copy to plot).
+
+        What is drawn is their min/max envelope (see min_max_envelope), kept up to date incrementally: points are
+        only reduced once, when their column is complete, so the cost of drawing doesn't grow with the number of
+        points, only with the width of the window. The ring only needs to hold the points not reduced yet.
+        """
+        self.capacity = capacity
+        self.xbuf = np.empty(2 * capacity)
+        self.ybuf = np.empty(2 * capacity)
+        self.start = 0  # index of the oldest point
+        self.count = 0
+        self.total = 0  # points ever added
         self.line_obj = line
+        self.changed = False  # points changed since the line was last drawn
+
+        self.column_width = None  # width of the envelope's columns in x, about a pixel
+        self.env_x = self.env_y = np.empty(0)  # envelope of the complete columns
+        self.pending = 0  # number of the first point (counting from the first ever added) not in env_x, env_y
+        self.lod_x = self.lod_y = np.empty(0)  # envelope of every point, what is drawn
+
+    @property
+    def xdata(self):
+        return self.xbuf[self.start:self.start + self.count]
+
+    @property
+    def ydata(self):
+        return self.ybuf[self.start:self.start + self.count]
+
+    def append(self, x, y):
+        if self.count == self.capacity:
+            self._drop_oldest()
+        i = (self.start + self.count) % self.capacity
+        self.xbuf[i] = self.xbuf[i + self.capacity] = x
+        self.ybuf[i] = self.ybuf[i + self.capacity] = y
+        self.count += 1
+        self.total += 1
+        self.changed = True
+
+    def trim(self, xmin):
+        """Drop the points (and envelope) before xmin, but one, so the line extends off-screen."""
+        while self.count > 1 and self.xbuf[self.start + 1] < xmin:
+            self._drop_oldest()
+        i = np.searchsorted(self.env_x, xmin) - 1
+        if i > 0:
+            self.env_x, self.env_y = self.env_x[i:], self.env_y[i:]
+
+    def update_envelope(self, column_width, complete=False):
+        """
+        Reduce the points added since the last call into the envelope, or all of it again if column_width changed.
+        complete also reduces the last column for good (so its points can be dropped), even if it gets more points.
+        """
+        first = max(self.pending - (self.total - self.count), 0)  # in the ring, points trimmed since are skipped
+        x, y = self.xdata[first:], self.ydata[first:]
+        if column_width != self.column_width:
+            # reduce what was already reduced again, along with the rest, as its points can be gone from the ring.
+            # Exact for wider columns, narrower ones keep the extremes of the previous width's
+            x, y = np.concatenate((self.env_x, x)), np.concatenate((self.env_y, y))
+            self.column_width = column_width
+            x, y, _, _ = min_max_envelope(x, y, column_width)
+            self.env_x, self.env_y = self.lod_x, self.lod_y = x, y
+            self.pending = self.total
+            return
+
+        count = len(x)
+        x, y, tail, split = min_max_envelope(x, y, column_width)
+        if complete:
+            tail, split = count, len(x)
+        # the last column can still get points, it is reduced again with them next time
+        self.env_x = np.concatenate((self.env_x, x[:split]))
+        self.env_y = np.concatenate((self.env_y, y[:split]))
+        self.pending = self.total - self.count + first + tail
+        self.lod_x = np.concatenate((self.env_x, x[split:]))
+        self.lod_y = np.concatenate((self.env_y, y[split:]))
+
+    def _drop_oldest(self):
+        self.start = (self.start + 1) % self.capacity
+        self.count -= 1
 
 
 class Plotter:
-    def __init__(self, xstart, xrange, yrange, title, xlabel, ylabel, solid_lines=()):
+    def __init__(self, xstart, xrange, yrange, title, xlabel, ylabel, solid_lines=(), capacity=10_000,
+                 scroll_step=None):
+        """
+        Plots lines in a window that scrolls to show the last xrange of x. Lines are blitted: only they are redrawn
+        on update(), on top of a saved background of the rest of the figure, which is only drawn again when the
+        window scrolls (or is resized).
+
+        Args:
+            capacity: most points kept per line not reduced into its envelope yet, they are reduced when it is
+                      reached, so it doesn't limit how many points are shown.
+            scroll_step: the window scrolls in steps of this (default: xrange / 48) once x passes its right edge,
+                         rather than with every point, so its ticks and labels are only redrawn at each step.
+        """
         self.lines = {}
+        self.capacity = capacity
 
         # plot parameters
         self.X_RANGE = xrange  # range of x-axis
         self.Y_RANGE = yrange  # range of y-axis
+        self.scroll_step = scroll_step or xrange / 48
+        self.xmax = xstart  # right edge of the window
 
         # create figure for plotting
         self.fig = plt.figure()
@@ -31,40 +151,107 @@ class Plotter:
         self.ax.set_xlabel(xlabel)
         self.ax.set_ylabel(ylabel)
 
+        self.background = None  # the figure without the lines, saved after each full draw
+        self.needs_draw = True  # the figure changed (other than the lines), so it must be drawn in full
+        self.shown = False
+        self.saving = False  # saving to an image, which draws the lines itself
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
         plt.ion()
 
     def plot(self, x, y, label):
         if label not in self.lines:
-            # create an initially blank line
-            xdata, ydata = [], []
-            line, = self.ax.plot(xdata, ydata, label=label)
-            self.lines[label] = Line(xdata, ydata, line)
+            # create an initially blank line, animated so it is left out of full draws and blitted instead
+            line, = self.ax.plot([], [], label=label, animated=True)
+            self.lines[label] = Line(self.capacity, line)
             self.ax.legend(loc="upper left")
+            self.needs_draw = True
 
         line = self.lines[label]
+        if line.count == line.capacity and line.pending <= line.total - line.count:
+            line.update_envelope(self.column_width(), complete=True)  # before points not reduced yet are dropped
+        line.append(x, y)
 
-        # extend line data
-        line.xdata.append(x)
-        line.ydata.append(y)
+        # move window once x passes its right edge, to the next multiple of scroll_step
+        if x > self.xmax:
+            self.xmax = ceil(x / self.scroll_step) * self.scroll_step
+            self.ax.set_xlim([self.xmax - self.X_RANGE, self.xmax])
+            self.needs_draw = True
 
         # trim values off the screen to save memory. keep one data point off-screen, so line extends off-screen.
-        while len(line.xdata) > 1 and line.xdata[1] < x - self.X_RANGE:
-            line.xdata.pop(0)
-            line.ydata.pop(0)
+        line.trim(self.xmax - self.X_RANGE)
 
-        # update line data
-        line.line_obj.set_xdata(line.xdata)
-        line.line_obj.set_ydata(line.ydata)
+    def _on_draw(self, event):
+        """After a full draw (ours, or the GUI's on resize), save the background and draw the lines on it."""
+        if self.saving:
+            return
+        canvas = self.fig.canvas
+        if canvas.supports_blit:
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
 
-        # move window
-        self.ax.set_xlim([x - self.X_RANGE, x])
+    def column_width(self):
+        """Width in x of a pixel column of the plot, the resolution lines are drawn at."""
+        return self.X_RANGE / max(round(self.ax.bbox.width), 1)
+
+    def _draw_lines(self):
+        """Set the data of the lines that changed (or if the window was resized), then draw every line."""
+        column_width = self.column_width()
+        for line in self.lines.values():
+            if line.changed or line.column_width != column_width:
+                line.update_envelope(column_width)
+                line.line_obj.set_data(line.lod_x, line.lod_y)
+                line.changed = False
+            self.ax.draw_artist(line.line_obj)  # the background has no lines
+
+    def redraw(self):
+        """Draw what changed: the whole figure if the window scrolled or a line was added, otherwise the lines."""
+        canvas = self.fig.canvas
+        if self.needs_draw or self.background is None:
+            self.needs_draw = False
+            canvas.draw()  # _on_draw saves the background and draws the lines
+        elif any(line.changed for line in self.lines.values()):  # (resizes are full draws)
+            canvas.restore_region(self.background)
+            self._draw_lines()
+        else:
+            return
+        if canvas.supports_blit:
+            canvas.blit(self.fig.bbox)
+
+    def save(self, file_path):
+        """
+        Save the plot as an image, in the format of file_path's extension. With the Agg backend a PNG is the canvas
+        as already drawn, other formats are drawn again. The image is written under a temporary name, then renamed,
+        so it is never read half written.
+        """
+        self.redraw()
+        tmp_path = "{}.tmp{}".format(*path.splitext(file_path))
+        canvas = self.fig.canvas
+        if file_path.lower().endswith(".png") and hasattr(canvas, "buffer_rgba"):
+            imsave(tmp_path, np.asarray(canvas.buffer_rgba()))
+        else:
+            self.saving = True  # the lines are drawn with the rest of the figure, not blitted
+            for line in self.lines.values():
+                line.line_obj.set_animated(False)
+            try:
+                self.fig.savefig(tmp_path)
+            finally:
+                for line in self.lines.values():
+                    line.line_obj.set_animated(True)
+                self.saving = False
+        replace(tmp_path, file_path)
 
     def update(self, seconds):
         """Give window time to update. Must be run periodically or window will show (Not Responding)."""
-        plt.figure(self.fig)
-        plt.pause(seconds)
+        if not self.shown:
+            plt.figure(self.fig)
+            plt.show(block=False)
+            self.shown = True
+        self.redraw()
+        self.fig.canvas.start_event_loop(seconds)
 
     def done(self):
         """Keep program running to keep window open. If program is done."""
+        self.redraw()
         plt.figure(self.fig)
         plt.show(block=True)
@@ -0,0 +1,165 @@
+import ctypes
+import ctypes.util
+import os
+import threading
+import time
+
+import serial.tools.list_ports
+
+# inotify constants, from <sys/inotify.h>
+IN_ATTRIB = 0x004
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+class _InotifyWatcher:
+    """Reports whether entries were created or removed in a directory since the last check, using Linux inotify."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CREATE | IN_DELETE | IN_ATTRIB) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def changed(self):
+        changed = False
+        try:
+            while os.read(self.fd, 4096):  # drain every queued event
+                changed = True
+        except BlockingIOError:
+            pass
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingWatcher:
+    """Fallback for _InotifyWatcher: a directory's modification time changes when entries are created or removed."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def changed(self):
+        mtime = self._mtime()
+        changed, self.mtime = mtime != self.mtime, mtime
+        return changed
+
+    def close(self):
+        pass
+
+
+def parse_port_spec(spec):
+    """
+    Parse a port given on the command line. Either a device name ("/dev/ttyACM0", "COM3") or a USB match of the form
+    "usb:<vid>:<pid>[:<serial number>]" with vid and pid in hex, e.g. "usb:239a:800c".
+
+    Returns:
+        (str | None, dict): the device name (or None), and the USB attributes to match (empty for a device name).
+
+    Raises:
+        ValueError: if a USB match has no vid or pid, or one that isn't hex.
+    """
+    if not spec.lower().startswith("usb:"):
+        return spec, {}
+    fields = spec.split(":")[1:]
+    try:
+        match = {"vid": int(fields[0], 16), "pid": int(fields[1], 16)}
+    except (IndexError, ValueError):
+        raise ValueError(f"invalid port {spec!r}: expected usb:<vid>:<pid>[:<serial number>], vid and pid in hex") from None
+    if len(fields) > 2 and fields[2]:
+        match["serial_number"] = ":".join(fields[2:])
+    return None, match
+
+
+class PortManager:
+    _shared = None
+
+    def __init__(self, max_age=60.0, watch_dir="/dev"):
+        """
+        Caches the list of serial ports, so it is only enumerated again when a device is plugged in or removed
+        (or every max_age seconds, in case a change was missed).
+
+        Args:
+            max_age: most seconds a cached list of ports is used for.
+            watch_dir: directory watched for device nodes being created or removed.
+                       Uses inotify on Linux, falling back to polling its modification time.
+        """
+        self.max_age = max_age
+        self.version = 0  # incremented each time the ports are enumerated and found to have changed
+        self.enumerations = 0  # number of times the ports were enumerated, for diagnostics
+        self._ports = None
+        self._enumerated_at = 0.0
+        self._lock = threading.Lock()
+
+        self._watcher = None
+        if os.path.isdir(watch_dir):
+            try:
+                self._watcher = _InotifyWatcher(watch_dir)
+            except (OSError, AttributeError, TypeError):  # not Linux, or no libc with inotify
+                self._watcher = _PollingWatcher(watch_dir)
+
+    @classmethod
+    def shared(cls):
+        """The PortManager used by every SerialReaderWriter that isn't given one."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def _refresh(self, force=False):
+        """Enumerate the ports again if a change was noticed or the cache is too old. Call with the lock held."""
+        changed = self._watcher.changed() if self._watcher else False
+        now = time.monotonic()
+        if self._ports is not None and not (force or changed or now - self._enumerated_at >= self.max_age):
+            return
+
+        ports = list(serial.tools.list_ports.comports())
+        self.enumerations += 1
+        self._enumerated_at = now
+        if self._ports is None or [p.device for p in ports] != [p.device for p in self._ports]:
+            self.version += 1
+        self._ports = ports
+
+    def ports(self, force=False):
+        """Return the serial ports on this machine, as serial.tools.list_ports ListPortInfo objects."""
+        with self._lock:
+            self._refresh(force)
+            return self._ports
+
+    def changed_since(self, version):
+        """Check if the available ports have changed since the version returned by an earlier check."""
+        with self._lock:
+            self._refresh()
+            return self.version != version
+
+    def find(self, device=None, vid=None, pid=None, serial_number=None):
+        """
+        Return the name of the first port matching every given attribute, or None if no port does.
+        A device that exists but isn't enumerated (e.g. a pseudo-terminal) matches by name.
+        """
+        for port in self.ports():
+            if ((device is None or port.device == device)
+                    and (vid is None or port.vid == vid)
+                    and (pid is None or port.pid == pid)
+                    and (serial_number is None or port.serial_number == serial_number)):
+                return port.device
+        if device is not None and vid is None and pid is None and serial_number is None and os.path.exists(device):
+            return device
+        return None
+
+    def close(self):
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
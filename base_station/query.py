@@ -0,0 +1,217 @@
+"""
+Reads stored sensor data back: the readings of some sensors in a time range, raw or aggregated per time bucket.
+Reads the day*-sensor*.csv data logs (compressed or not) of every run folder, seeking with their time indexes
+(see timeindex.py), and scans logs in parallel.
+
+    python query.py --sensor 7 --start "2025-01-21 02:00" --end "2025-01-21 03:00"
+    python query.py --sensor 1 --sensor 2 --agg mean --bucket 15m --format json -o means.jsonl
+    python query.py --agg last
+
+Times are local, like in the data logs, which only record them to the second.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime as dt
+from itertools import chain
+
+import numpy as np
+
+from timeindex import TIME_FORMAT, find_segments, list_segments, parse_time, read_range
+
+AGGREGATIONS = ("raw", "mean", "min", "max", "last")
+FIELDS = {"voltage": 2, "logvoltage": 4, "batvoltage": 5}  # aggregatable columns of the data logs
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86_400}
+
+
+def parse_duration(text):
+    """Parse a duration like "90s", "15m", "1h" or "1d" (plain numbers are seconds) to seconds."""
+    text = text.strip().lower()
+    if text and text[-1] in DURATION_UNITS:
+        return float(text[:-1]) * DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+def parse_datetime(text):
+    """Parse a local time given as ISO 8601 ("2025-01-21 02:00") or like in the data logs, to seconds since the epoch."""
+    try:
+        return dt.fromisoformat(text).timestamp()
+    except ValueError:
+        return dt.strptime(text, TIME_FORMAT).timestamp()
+
+
+def _read_columns(index, start, end):
+    """Read the rows of a log in [start, end] as (times, values) arrays, values holding the numeric columns."""
+    rows = [row for row in read_range(index, start, end) if len(row) >= 6]  # skip rows cut short by a crash
+    if not rows:
+        return np.empty(0), np.empty((0, 4))
+    columns = list(zip(*rows))
+    # rows share time strings (readings arrive several per second), so only parse each distinct one
+    texts, inverse = np.unique(np.array(columns[0]), return_inverse=True)
+    times = np.array([parse_time(t) for t in texts])[inverse]
+    values = np.array(columns[2:6], dtype=np.float64).T
+    return times, values
+
+
+def _scan(index, start, end, bucket, shift, column):
+    """
+    Read one log, for a worker. Returns its (times, values) if bucket is None, otherwise per bucket partial
+    aggregates of the column: (bucket keys, count, sum, min, max, last time, last value).
+    """
+    times, values = _read_columns(index, start, end)
+    if bucket is None:
+        return times, values
+
+    values = values[:, column]
+    keys, inverse = np.unique(np.floor((times + shift) / bucket).astype(np.int64), return_inverse=True)
+    count = np.bincount(inverse, minlength=len(keys))
+    total = np.bincount(inverse, weights=values, minlength=len(keys))
+    low = np.full(len(keys), np.inf)
+    high = np.full(len(keys), -np.inf)
+    np.minimum.at(low, inverse, values)
+    np.maximum.at(high, inverse, values)
+    last = np.zeros(len(keys), dtype=np.int64)
+    np.maximum.at(last, inverse, np.arange(len(times)))  # last row of each bucket
+    return keys, count, total, low, high, times[last], values[last]
+
+
+def _merge(parts):
+    """Merge the partial aggregates of several logs (which can share buckets at their boundaries)."""
+    keys, count, total, low, high, last_time, last_value = (np.concatenate(column) for column in zip(*parts))
+    merged, inverse = np.unique(keys, return_inverse=True)
+    n = len(merged)
+    out_low, out_high = np.full(n, np.inf), np.full(n, -np.inf)
+    np.minimum.at(out_low, inverse, low)
+    np.maximum.at(out_high, inverse, high)
+    order = np.lexsort((last_time, inverse))  # by bucket, then time: the last of each bucket is its latest row
+    latest = order[np.r_[np.flatnonzero(np.diff(inverse[order])), len(order) - 1]]
+    return (merged, np.bincount(inverse, weights=count, minlength=n).astype(np.int64),
+            np.bincount(inverse, weights=total, minlength=n), out_low, out_high, last_time[latest], last_value[latest])
+
+
+def _format_time(timestamp):
+    return dt.fromtimestamp(timestamp).isoformat(sep=" ")
+
+
+def query(root, sensors=None, start=None, end=None, agg="raw", bucket=None, field="voltage", workers=None):
+    """
+    Read the readings of sensors stored under root in [start, end].
+
+    Args:
+        root: folder of run folders (e.g. "logs"), or a single run folder.
+        sensors: sensor ids to read, or None for every sensor found.
+        start, end: time range in seconds since the epoch. None leaves that end of the range open.
+        agg: "raw" for every reading, "mean", "min" or "max" of field per bucket, or "last" for the last reading
+             (per bucket, if bucket is given).
+        bucket: bucket length in seconds, for aggregations. Buckets are aligned to local midnight.
+        field: column aggregated: "voltage" (wheatstone), "logvoltage" or "batvoltage".
+        workers: processes scanning logs in parallel, defaults to the number of CPUs. 1 scans in this process.
+
+    Yields:
+        dict: one record per reading (agg="raw"), or per sensor and bucket, ordered by sensor then time.
+              Times are local ISO 8601 strings.
+    """
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"agg must be one of {', '.join(AGGREGATIONS)}")
+    if agg in ("mean", "min", "max") and not bucket:
+        raise ValueError(f"agg={agg} needs a bucket length")
+    if sensors is None:
+        sensors = sorted({sensor for sensor, _, _ in list_segments(root)})
+
+    column = FIELDS[field] - 2
+    shift = time.localtime(start if start is not None else time.time()).tm_gmtoff  # align buckets to local time
+    if agg == "last" and not bucket:
+        bucket = float("inf")  # a single bucket: every reading has key 0 (or -0)
+    if bucket == float("inf"):
+        shift = 0
+
+    jobs = [(sensor, index) for sensor in sensors for index in find_segments(root, sensor, start, end)]
+    workers = workers or min(len(jobs), os.cpu_count() or 1) or 1
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        args = [(index, start, end, None if agg == "raw" else bucket, shift, column) for _, index in jobs]
+        results = pool.map(_scan, *zip(*args)) if pool and args else map(lambda a: _scan(*a), args)
+        yield from _records(jobs, results, agg, bucket, shift, field)
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+
+def _records(jobs, results, agg, bucket, shift, field):
+    """Turn scan results, in the order of jobs (grouped by sensor), into records."""
+    parts, current = [], None
+    for (sensor, _), result in zip(jobs + [(None, None)], chain(results, [None])):
+        if agg != "raw" and sensor != current and parts:  # every log of the previous sensor was scanned
+            keys, count, total, low, high, last_time, last_value = _merge(parts)
+            for i in range(len(keys)):
+                if agg == "last":
+                    record = {"sensor": current, "time": _format_time(last_time[i]), field: float(last_value[i])}
+                else:
+                    value = {"mean": total[i] / count[i], "min": low[i], "max": high[i]}[agg]
+                    record = {"sensor": current, "time": _format_time(keys[i] * bucket - shift),
+                              "count": int(count[i]), f"{agg}_{field}": float(value)}
+                yield record
+            parts = []
+        current = sensor
+        if result is None:
+            continue
+
+        if agg == "raw":
+            times, values = result
+            for t, (v, r, lv, bv) in zip(times.tolist(), values.tolist()):
+                yield {"sensor": sensor, "time": _format_time(t), "voltage": v, "range": int(r),
+                       "logvoltage": lv, "batvoltage": bv}
+        elif len(result[0]):
+            parts.append(result)
+
+
+def write_records(records, out, fmt="csv"):
+    """Write records to the file object out, as CSV (with a header) or JSON lines. Returns the number written."""
+    count = 0
+    writer = None
+    for record in records:
+        if fmt == "json":
+            out.write(json.dumps(record) + "\n")
+        else:
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(record), lineterminator="\n")
+                writer.writeheader()
+            writer.writerow(record)
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="smartbricks query", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default="logs", help="folder of run folders to read (default: logs)")
+    parser.add_argument("--sensor", type=int, action="append", dest="sensors",
+                        help="sensor id to read, can be repeated (default: every sensor)")
+    parser.add_argument("--start", type=parse_datetime, help="first time to read, local")
+    parser.add_argument("--end", type=parse_datetime, help="last time to read, local")
+    parser.add_argument("--agg", choices=AGGREGATIONS, default="raw", help="aggregation (default: raw)")
+    parser.add_argument("--bucket", type=parse_duration, help="bucket length for aggregations, e.g. 30s, 15m, 1h, 1d")
+    parser.add_argument("--field", choices=list(FIELDS), default="voltage", help="column to aggregate")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv", help="csv, or json (one object per line)")
+    parser.add_argument("--workers", type=int, help="processes scanning logs in parallel (default: CPUs)")
+    parser.add_argument("-o", "--output", help="file to write, defaults to standard output")
+    args = parser.parse_args(argv)
+
+    try:
+        records = query(args.root, args.sensors, args.start, args.end, args.agg, args.bucket, args.field, args.workers)
+        if args.output:
+            with open(args.output, 'w', newline='') as out:
+                count = write_records(records, out, args.format)
+            print(f"Wrote {count} records to {args.output}.", file=sys.stderr)
+        else:
+            write_records(records, sys.stdout, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
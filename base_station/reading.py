@@ -0,0 +1,84 @@
+from array import array
+
+
+class Reading:
+    """Result of one BaseStationReader.read(). Data fields are None unless status is ReadResult.SUCCESS."""
+
+    __slots__ = ("status", "message", "sensor_id", "voltage", "mrange", "logvoltage", "batvoltage")
+
+    def __init__(self, status, message, sensor_id=None, voltage=None, mrange=None, logvoltage=None, batvoltage=None):
+        self.status = status  # ReadResult
+        self.message = message  # str or ReadMessage, use str() to format it
+        self.sensor_id = sensor_id
+        self.voltage = voltage  # wheatstone voltage
+        self.mrange = mrange
+        self.logvoltage = logvoltage  # log amp voltage
+        self.batvoltage = batvoltage  # battery voltage
+
+    def __repr__(self):
+        return f"Reading({self.status!r}, {str(self.message)!r})"
+
+
+class ReadingBatch:
+    """
+    Successful readings stored column by column in flat arrays rather than as one object per reading.
+    Clearing a batch keeps its arrays, so a batch that is reused doesn't allocate once it has grown.
+    """
+
+    def __init__(self, port_names=()):
+        """
+        Args:
+            port_names: names of the ports readings can come from. The port column holds indexes into this.
+        """
+        self.port_names = list(port_names)
+        self.timestamp = array('d')  # seconds since the epoch, when the reading was received
+        self.port = array('H')
+        self.sensor_id = array('q')
+        self.voltage = array('d')
+        self.mrange = array('b')
+        self.logvoltage = array('d')
+        self.batvoltage = array('d')
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def append(self, timestamp, port, reading: Reading):
+        """
+        Add a successful reading received at timestamp (seconds since the epoch) from the port with this index.
+        If a value doesn't fit its column (OverflowError, TypeError), nothing is added and the error is raised.
+        """
+        count = len(self.timestamp)
+        try:
+            self.timestamp.append(timestamp)
+            self.port.append(port)
+            self.sensor_id.append(reading.sensor_id)
+            self.voltage.append(reading.voltage)
+            self.mrange.append(reading.mrange)
+            self.logvoltage.append(reading.logvoltage)
+            self.batvoltage.append(reading.batvoltage)
+        except Exception:
+            for column in self._columns():  # keep every column the same length
+                del column[count:]
+            raise
+
+    def _columns(self):
+        return self.timestamp, self.port, self.sensor_id, self.voltage, self.mrange, self.logvoltage, self.batvoltage
+
+    def clear(self):
+        for column in self._columns():
+            del column[:]
+
+    def rows_by_sensor(self):
+        """Return the indexes of the readings from each sensor, in the order they were received."""
+        rows = {}
+        for i, sensor_id in enumerate(self.sensor_id):
+            rows.setdefault(sensor_id, []).append(i)
+        return rows
+
+    def port_name(self, i):
+        """Name of the port the reading at index i came from."""
+        return self.port_names[self.port[i]]
+
+    def out_of_range(self, low, high):
+        """Return the indexes of readings whose wheatstone voltage is outside [low, high]."""
+        return [i for i, v in enumerate(self.voltage) if not low <= v <= high]
@@ -0,0 +1,127 @@
+"""
+Rollups of the readings of each sensor: count, and min/max/mean/last of the wheatstone, log amp and battery voltages,
+per minute, hour and day. Kept up to date as readings arrive, and written to rollup-{resolution}.csv in the run folder
+as each bucket closes, so long time ranges can be read from a few rows per bucket instead of every reading.
+"""
+import csv
+import time
+from datetime import datetime as dt
+from os import path
+
+from csvwriter import CSVWriter
+
+RESOLUTIONS = {"1min": 60, "1h": 3_600, "1d": 86_400}  # bucket lengths in seconds, buckets align to local midnight
+FIELDS = ("Wheatstone Voltage", "Log Amp Voltage", "Battery Voltage")
+ROLLUP_HEADER = ["Bucket Start (mm-dd-yyyy H:M:S)", "Bucket Start (s)", "Sensor", "Count",
+                 *(f"{field} {stat}" for field in FIELDS for stat in ("Min", "Max", "Mean", "Last"))]
+ROLLUP_NAME = "rollup-{resolution}.csv"
+
+
+class Bucket:
+    __slots__ = ("key", "count", "low", "high", "total", "last")
+
+    def __init__(self, key, values):
+        """Aggregates of one sensor's readings in one bucket, starting with a reading's (v, log amp v, battery v)."""
+        self.key = key
+        self.count = 1
+        self.low = list(values)
+        self.high = list(values)
+        self.total = list(values)
+        self.last = values
+
+    def add(self, values):
+        self.count += 1
+        low, high, total = self.low, self.high, self.total
+        for i, value in enumerate(values):
+            if value < low[i]:
+                low[i] = value
+            elif value > high[i]:
+                high[i] = value
+            total[i] += value
+        self.last = values
+
+    def mean(self, i):
+        return self.total[i] / self.count
+
+
+class Rollups:
+    def __init__(self, folder, resolutions=RESOLUTIONS, on_close=None, sync_interval=5.0):
+        """
+        Args:
+            folder: folder the rollup-{resolution}.csv files are written to.
+            resolutions: name -> bucket length in seconds, of each rollup kept.
+            on_close: called with (resolution name, sensor id, bucket start in seconds since the epoch, Bucket)
+                      when a bucket closes, after it is written.
+            sync_interval: most seconds a closed bucket waits to be synced to disk.
+        """
+        self.resolutions = dict(resolutions)
+        self.on_close = on_close
+        self.shift = time.localtime().tm_gmtoff  # offset of local time, so buckets start at local midnight
+        self.buckets = {}  # (resolution name, sensor id) -> open Bucket
+        self.writers = {name: CSVWriter(path.join(folder, ROLLUP_NAME.format(resolution=name)), header=ROLLUP_HEADER,
+                                        sync_rows=10**9, sync_interval=sync_interval)
+                        for name in resolutions}
+
+    def add(self, sensor_id, timestamp, values):
+        """Account for a reading of (wheatstone voltage, log amp voltage, battery voltage) received at timestamp."""
+        shifted = timestamp + self.shift
+        buckets = self.buckets
+        for name, seconds in self.resolutions.items():
+            key = int(shifted // seconds)
+            bucket = buckets.get((name, sensor_id))
+            if bucket is not None and bucket.key == key:
+                bucket.add(values)
+                continue
+            if bucket is not None:  # readings reached the next bucket
+                self._close(name, sensor_id, bucket)
+            buckets[(name, sensor_id)] = Bucket(key, values)
+
+    def add_many(self, sensor_id, timestamps, values):
+        """Account for readings of one sensor, given their times and (v, log amp v, battery v) in the same order."""
+        for timestamp, reading in zip(timestamps, values):
+            self.add(sensor_id, timestamp, reading)
+
+    def close_due(self, timestamp=None):
+        """Close the buckets that ended before timestamp (default now), e.g. of sensors that stopped reporting."""
+        shifted = (time.time() if timestamp is None else timestamp) + self.shift
+        for (name, sensor_id), bucket in list(self.buckets.items()):
+            if (bucket.key + 1) * self.resolutions[name] <= shifted:
+                del self.buckets[(name, sensor_id)]
+                self._close(name, sensor_id, bucket)
+
+    def sync_if_due(self):
+        for writer in self.writers.values():
+            writer.sync_if_due()
+
+    def _close(self, name, sensor_id, bucket):
+        start = bucket.key * self.resolutions[name] - self.shift
+        row = [dt.fromtimestamp(start).strftime("%m-%d-%Y %I:%M:%S %p"), start, sensor_id, bucket.count]
+        for i in range(len(FIELDS)):
+            row += ["%.5f" % bucket.low[i], "%.5f" % bucket.high[i], "%.5f" % bucket.mean(i), "%.5f" % bucket.last[i]]
+        self.writers[name].write(row)
+        if self.on_close:
+            self.on_close(name, sensor_id, start, bucket)
+
+    def close(self):
+        """Write the buckets still open (they are partial) and close the files."""
+        for (name, sensor_id), bucket in self.buckets.items():
+            self._close(name, sensor_id, bucket)
+        self.buckets.clear()
+        for writer in self.writers.values():
+            writer.close()
+
+
+def read_rollups(folder, resolution="1h", sensors=None, start=None, end=None):
+    """
+    Yield the rows of a run folder's rollup as dicts (keys from ROLLUP_HEADER, numbers parsed), optionally only those
+    of some sensors with buckets starting in [start, end] (seconds since the epoch).
+    """
+    with open(path.join(folder, ROLLUP_NAME.format(resolution=resolution)), newline='') as file:
+        for row in csv.DictReader(file):
+            bucket_start = float(row["Bucket Start (s)"])
+            sensor_id = int(row["Sensor"])
+            if ((sensors is None or sensor_id in sensors)
+                    and (start is None or bucket_start >= start) and (end is None or bucket_start <= end)):
+                row = {key: value if i == 0 else float(value) for i, (key, value) in enumerate(row.items())}
+                row["Sensor"], row["Count"] = sensor_id, int(row["Count"])
+                yield row
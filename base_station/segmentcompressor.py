@@ -0,0 +1,152 @@
+"""
+Compresses closed data log segments in the background, and reads segments the same way whether they are compressed
+or not. Uses zstd if the zstandard package is installed, gzip otherwise.
+
+Segments can also be compressed by hand, e.g. those left by a run that was stopped:
+    python segmentcompressor.py logs/01-22-2025_T17-12-21/day*-sensor*.csv
+"""
+import argparse
+import csv
+import gzip
+import io
+import os
+import queue
+import shutil
+import threading
+from traceback import format_exc
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_EXTENSIONS = (".zst", ".gz")
+
+
+def compress_file(file_path, use_zstd=None, level=None):
+    """
+    Compress a file next to itself (adding .zst or .gz to its name), then remove the original.
+    The compressed file is written under a temporary name and synced before being renamed, so a crash never leaves
+    a truncated segment behind, or loses the original.
+
+    Returns:
+        str: path of the compressed file.
+    """
+    use_zstd = zstandard is not None if use_zstd is None else use_zstd
+    out_path = file_path + (".zst" if use_zstd else ".gz")
+    tmp_path = out_path + ".tmp"
+
+    with open(file_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        if use_zstd:
+            zstandard.ZstdCompressor(level=level or 3).copy_stream(src, dst)
+        else:
+            with gzip.GzipFile(filename=os.path.basename(file_path), mode='wb', fileobj=dst,
+                               compresslevel=level or 6) as gz:
+                shutil.copyfileobj(src, gz, 1024 * 1024)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    os.replace(tmp_path, out_path)
+    os.remove(file_path)
+    return out_path
+
+
+def find_segment(file_path):
+    """Return the path a segment is stored under now: as written, or compressed. None if it doesn't exist."""
+    for candidate in (file_path, *(file_path + ext for ext in COMPRESSED_EXTENSIONS)):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def open_segment(file_path, binary=False):
+    """
+    Open a segment for reading, decompressing it on the fly if its name ends in .gz or .zst.
+    Opened as text, unless binary is set. Binary compressed segments can be seek()ed forward to uncompressed offsets.
+    """
+    if file_path.endswith(".gz"):
+        file = gzip.open(file_path, 'rb')
+    elif file_path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"The zstandard package is needed to read {file_path}")
+        file = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+    else:
+        file = open(file_path, 'rb')
+    return file if binary else io.TextIOWrapper(file, newline='')
+
+
+def iter_rows(file_path, skip_header=True):
+    """
+    Yield the rows of a CSV segment, compressed or not, as lists of strings. skip_header skips its first row if it
+    is a header (logs written before headers were added have none).
+    """
+    from timeindex import is_header  # timeindex imports this module
+
+    with open_segment(file_path) as file:
+        reader = csv.reader(file)
+        first = next(reader, None)
+        if first is not None and not (skip_header and is_header(first)):
+            yield first
+        yield from reader
+
+
+class SegmentCompressor(threading.Thread):
+    def __init__(self, use_zstd=None, level=None, on_error=None, on_compressed=None):
+        """
+        Compresses segments handed to it with submit() one at a time on a background thread,
+        so rotating data logs never waits on compression.
+
+        Args:
+            use_zstd: compress with zstd rather than gzip. Defaults to zstd if the zstandard package is installed.
+            level: compression level, defaults to 3 for zstd and 6 for gzip.
+            on_error: called with (file path, traceback string) when a segment can't be compressed.
+            on_compressed: called with (file path, compressed file path) after a segment is compressed.
+        """
+        super().__init__(name="SegmentCompressor", daemon=True)
+        self.use_zstd = use_zstd
+        self.level = level
+        self.on_error = on_error
+        self.on_compressed = on_compressed
+        self.queue = queue.Queue()
+        self.compressed = 0
+
+    def submit(self, file_path):
+        """Queue a closed segment to be compressed. It must not be written to again."""
+        self.queue.put(file_path)
+
+    def run(self):
+        while True:
+            file_path = self.queue.get()
+            if file_path is None:
+                break
+            try:
+                out_path = compress_file(file_path, self.use_zstd, self.level)
+                self.compressed += 1
+                if self.on_compressed:
+                    self.on_compressed(file_path, out_path)
+            except Exception:
+                if self.on_error:
+                    self.on_error(file_path, format_exc())
+
+    def stop(self, timeout=None):
+        """Finish compressing the queued segments (waiting at most timeout seconds), then exit."""
+        self.queue.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="closed segments to compress")
+    parser.add_argument("--gzip", action="store_true", help="use gzip even if zstandard is installed")
+    parser.add_argument("--level", type=int, help="compression level")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        before = os.path.getsize(file_path)
+        out_path = compress_file(file_path, use_zstd=False if args.gzip else None, level=args.level)
+        print(f"{file_path} -> {out_path} ({before / max(os.path.getsize(out_path), 1):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,126 @@
+import time
+
 import serial
-import serial.tools.list_ports
+
+from portmanager import PortManager
 
 
 class SerialReaderWriter:
-    def __init__(self, port='ttyACM0', baudrate=9600, timeout=60):
+    def __init__(self, port='ttyACM0', baudrate=9600, timeout=60, fallback=True, match=None, port_manager=None,
+                 min_backoff=0.5, max_backoff=30.0):
+        """
+        Args:
+            port: name of the serial port to connect to, or None to connect to any port matching `match`.
+            baudrate: baud rate of the serial connection.
+            timeout: read timeout in seconds.
+            fallback: if the port isn't found, connect to the first available port instead.
+                      Should be False when several SerialReaderWriters share one machine.
+            match: USB attributes the port must have, any of vid, pid and serial_number
+                   (e.g. {"vid": 0x239A, "pid": 0x800C}). Identifies a board whatever name it is given when plugged in.
+            port_manager: PortManager used to find ports. Defaults to one shared by every SerialReaderWriter.
+            min_backoff: seconds to wait before retrying a failed connection. Doubles after each failure.
+            max_backoff: most seconds to wait between connection attempts.
+                         A device being plugged in or removed triggers an attempt straight away.
+        """
+        self.requested = port  # the port asked for, self.com is the port actually used
         self.com = port
+        self.fallback = fallback
+        self.match = match or {}
+        self.port_manager = port_manager or PortManager.shared()
         self.baud = baudrate
         self.timeout = timeout
         self.ser = None
+        self._buffer = bytearray()  # bytes received after the last complete line, carried over between bulk reads
+
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._backoff = min_backoff
+        self._next_attempt = 0.0
+        self._ports_version = None  # PortManager version at the last attempt
+        self._last_report = None  # last problem printed, so repeated failures aren't printed every attempt
+        self.disconnected_at = None  # time.monotonic() of the last disconnect
+        self.reconnect_latency = None  # seconds between the last disconnect and the reconnect that followed it
 
     def is_connected(self):
         """Check if the serial object exists and is open."""
         return self.ser and self.ser.isOpen()
 
+    def _report(self, message):
+        """Print a connection problem, unless it is the same as the last one."""
+        if message != self._last_report:
+            print(message)
+            self._last_report = message
+
     def find_port(self):
         """Attempt to find the specified port or an available alternative."""
-        ports = [p.device for p in serial.tools.list_ports.comports()]
-        if self.com in ports:
-            return self.com
-        elif ports:
-            print(f"Port {self.com} not found. Available ports: {ports}")
-            print(f"Attempting to use port {ports[0]} instead.")
+        found = self.port_manager.find(self.requested, **self.match)
+        if found:
+            return found
+
+        ports = [p.device for p in self.port_manager.ports()]
+        wanted = self.requested or " ".join(f"{k}={v:#06x}" if isinstance(v, int) else f"{k}={v}" for k, v in self.match.items())
+        if ports and self.fallback and not self.match:
+            self._report(f"Port {wanted} not found. Available ports: {ports}\nAttempting to use port {ports[0]} instead.")
             return ports[0]
+        elif ports:
+            self._report(f"Port {wanted} not found. Available ports: {ports}")
+            return None
         else:
-            print("No available serial ports found.")
+            self._report("No available serial ports found.")
             return None
 
     def connect(self):
-        """Try to open serial connection. Returns True if successful, False if not."""
-        if self.ser is None:
-            self.com = self.find_port()
-            if not self.com:
-                return False
-            try:
-                self.ser = serial.Serial(port=self.com, baudrate=self.baud, timeout=self.timeout)
-                return True
-            except serial.SerialException as e:
-                print(f"Failed to open port {self.com}: {e}")
-                return False
+        """
+        Try to open serial connection. Returns True if successful, False if not.
+        After a failure, further attempts return False straight away until the backoff delay has passed,
+        unless a device was plugged in or removed in the meantime.
+        """
+        if self.is_connected():
+            return True
 
-        if self.ser.isOpen():
+        now = time.monotonic()
+        if now < self._next_attempt and not self.port_manager.changed_since(self._ports_version):
+            return False
+        self._ports_version = self.port_manager.version
+
+        if self._open():
+            if self.disconnected_at is not None:
+                self.reconnect_latency = time.monotonic() - self.disconnected_at
+            self._backoff = self.min_backoff
+            self._next_attempt = 0.0
+            self._last_report = None
             return True
 
+        self._next_attempt = now + self._backoff
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+        return False
+
+    def _open(self):
+        """Find the port and open it. Returns True if successful, False if not."""
+        if self.ser is not None:
+            try:
+                self.ser.open()  # same device as before
+                return True
+            except serial.SerialException:
+                self.ser = None  # it may come back under another name, so look for it again
+
+        self.com = self.find_port()
+        if not self.com:
+            return False
         try:
-            self.ser.open()
+            self.ser = serial.Serial(port=self.com, baudrate=self.baud, timeout=self.timeout)
             return True
         except serial.SerialException as e:
-            print(f"Failed to reopen port {self.com}: {e}")
+            self._report(f"Failed to open port {self.com}: {e}")
             return False
 
     def disconnect(self):
         """Close the serial connection if it exists."""
         if self.ser:
+            if self.ser.isOpen():
+                self.disconnected_at = time.monotonic()
             self.ser.close()
+        self._buffer.clear()  # a partial line can't be completed by a new connection
 
     def read(self):
         """
@@ -61,6 +129,38 @@ class SerialReaderWriter:
         """
         return self.ser.readline().decode('utf-8')[:-2]
 
+    def read_available(self):
+        """
+        Read every byte waiting in the serial buffer with a single call and return the complete lines received,
+        as bytes without their line endings. An incomplete trailing line is kept and finished by a later call.
+        Never blocks waiting for a line to complete.
+        May raise serial.SerialException or AttributeError.
+        """
+        waiting = self.ser.inWaiting()
+        if waiting:
+            self._buffer += self.ser.read(waiting)
+
+        end = self._buffer.rfind(b"\n")
+        if end < 0:
+            return []
+
+        lines = self._buffer[:end].split(b"\n")
+        del self._buffer[:end + 1]
+        return [line[:-1] if line.endswith(b"\r") else line for line in lines]
+
+    def iter_lines(self):
+        """
+        Yield each complete line waiting on the serial connection, decoded, without the line ending.
+        Lines that can't be decoded are yielded as the UnicodeDecodeError raised for them instead, so one bad
+        line doesn't cost the rest of the batch.
+        May raise serial.SerialException or AttributeError.
+        """
+        for line in self.read_available():
+            try:
+                yield line.decode('utf-8')
+            except UnicodeDecodeError as e:
+                yield e
+
     def has_waiting(self):
         """Check if there is data waiting in the serial buffer."""
         return self.ser and self.ser.inWaiting()
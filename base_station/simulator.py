@@ -0,0 +1,260 @@
+"""
+Simulates BaseStations on Linux pseudo-terminals, so main.py and the rest of the pipeline can be run and load-tested
+without Feather boards.
+
+Lines are generated in the formats the firmware sends (LoRa receiver data lines, connection chatter and restarts, or
+the hardwired hub's "Sensor N: v" lines), or replayed from existing logs (errors.log or day*-sensor*.csv) at up to
+1000x real time.
+
+Examples:
+    python simulator.py --sensors 40 --rate 2 --link /tmp/ttySIM0
+    python main.py /tmp/ttySIM0
+
+    python simulator.py --replay "logs/01-22-2025_T17-12-21/day*-sensor*.csv" --speed 500
+"""
+import argparse
+import errno
+import glob
+import heapq
+import os
+import pty
+import random
+import re
+import time
+import tty
+from datetime import datetime as dt
+from itertools import count
+
+# lines the LoRa receiver prints when it starts up
+STARTUP_LINES = ["Feather LoRa RX Test!", "LoRa radio init OK!", "Set Freq to: 915.00"]
+DISCONNECT_LINES = ["Timeout connecting to device {id}", "Couldn't connect to device {id}",
+                    "Couldn't discover attributes of device {id}", "Couldn't read data from device {id}"]
+
+DATA_LINE = "{id} {voltage:.5f} {mrange} {logvoltage:.5f} {batvoltage:.5f}"
+HARDWIRED_LINE = "Sensor {id}: {voltage:.2f}"
+
+# time logged, message (after the port, when reading several: "time | port: message", never "sensor: ...")
+LOG_LINE_PATTERN = re.compile(r"(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) - \w+ - .*? \| (?:(?!sensor: )\S+: )?(.*)")
+LOG_DATA_PATTERN = re.compile(r"sensor: (\d+), wheatstone voltage: +(\S+), range: (\d+), "
+                              r"log amp voltage: +(\S+), battery voltage: +(\S+)")
+LOG_RECEIVED_PATTERN = re.compile(r"Received '(.*)'\.")
+CSV_SENSOR_PATTERN = re.compile(r"sensor(\d+)\.csv")
+
+
+class SerialSimulator:
+    def __init__(self, link=None):
+        """
+        A pseudo-terminal that behaves like a BaseStation's serial port. Open `port` with SerialReaderWriter.
+
+        Args:
+            link: optional path of a symlink to create to the port, to give it a stable name.
+        """
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)  # no echo or newline translation, like a real serial port
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+        self.link = link
+        self.lines_written = 0
+        self.bytes_dropped = 0  # bytes discarded because nobody was reading and the pty buffer was full
+
+        if link:
+            if os.path.lexists(link):
+                os.remove(link)
+            os.symlink(self.port, link)
+
+    def write(self, data: bytes):
+        try:
+            written = os.write(self.master, data)
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.EIO):
+                raise
+            written = 0
+        self.bytes_dropped += len(data) - written
+
+    def write_line(self, line: str):
+        self.write(line.encode('utf-8') + b"\r\n")
+        self.lines_written += 1
+
+    def close(self):
+        if self.link and os.path.islink(self.link):
+            os.remove(self.link)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def synthetic_lines(sensors=4, rate=0.2, noise=0.01, line_format="lora", disconnect_prob=0.0, garbage_prob=0.0,
+                    restart_every=None, seed=None):
+    """
+    Generate (seconds since start, line) forever, for sensors reporting at rate readings/sec each.
+
+    Args:
+        sensors: number of sensors, with ids 1..sensors.
+        rate: readings per second from each sensor.
+        noise: standard deviation of the random walk of each sensor's voltage, in volts per reading.
+        line_format: "lora" for the LoRa receiver's data lines, "hardwired" for the hub's "Sensor N: v" lines.
+        disconnect_prob: probability a reading is replaced by one of the "Couldn't connect to device" lines.
+        garbage_prob: probability a reading is replaced by a line of random bytes.
+        restart_every: seconds between simulated BaseStation restarts, or None.
+        seed: seed for the random generator, for reproducible runs.
+    """
+    rng = random.Random(seed)
+    voltages = {i: rng.uniform(0.5, 3.0) for i in range(1, sensors + 1)}
+    battery = {i: rng.uniform(3.6, 4.2) for i in voltages}
+
+    # each sensor reports on its own schedule, starting at a random phase
+    schedule = [(rng.uniform(0, 1 / rate), i) for i in voltages]
+    heapq.heapify(schedule)
+    next_restart = restart_every
+
+    if line_format == "lora":
+        for line in STARTUP_LINES:
+            yield 0.0, line
+
+    while True:
+        t, sensor = heapq.heappop(schedule)
+        heapq.heappush(schedule, (t + 1 / rate, sensor))
+
+        if next_restart is not None and t >= next_restart:
+            next_restart += restart_every
+            if line_format == "lora":
+                yield t, "Restarting BaseStation"
+                for line in STARTUP_LINES:
+                    yield t, line
+
+        roll = rng.random()
+        if roll < garbage_prob:
+            yield t, bytes(rng.randrange(256) for _ in range(rng.randint(1, 40)))
+            continue
+        if roll < garbage_prob + disconnect_prob:
+            if line_format == "lora":
+                yield t, rng.choice(DISCONNECT_LINES).format(id=sensor)
+            continue
+
+        voltages[sensor] = min(max(voltages[sensor] + rng.gauss(0, noise), 0.0), 3.3)
+        battery[sensor] = max(battery[sensor] - 1e-5, 3.3)
+        if line_format == "lora":
+            yield t, DATA_LINE.format(id=sensor, voltage=voltages[sensor], mrange=rng.randint(0, 3),
+                                      logvoltage=rng.uniform(0, 2), batvoltage=battery[sensor])
+        else:
+            yield t, HARDWIRED_LINE.format(id=sensor, voltage=voltages[sensor])
+
+
+def replay_errors_log(path):
+    """Generate (seconds since the first entry, line) for the BaseStation lines recorded in an errors.log."""
+    start = None
+    with open(path, newline='') as file:
+        for entry in file:
+            match = LOG_LINE_PATTERN.match(entry.rstrip("\r\n"))
+            if not match:
+                continue  # tracebacks, and lines from other formats
+
+            message = match.group(2)
+            data = LOG_DATA_PATTERN.fullmatch(message)
+            received = LOG_RECEIVED_PATTERN.fullmatch(message)
+            if data:
+                line = " ".join(data.groups())
+            elif received:
+                line = received.group(1)
+            else:
+                continue  # messages from main.py itself, e.g. "BaseStation connected."
+
+            t = dt.strptime(match.group(1), "%Y-%m-%d %H:%M:%S,%f").timestamp()
+            start = t if start is None else start
+            yield t - start, line
+
+
+def replay_csv(paths):
+    """Generate (seconds since the first row, data line) from day*-sensor*.csv files, merged in time order."""
+
+    def rows(path):
+        sensor = CSV_SENSOR_PATTERN.search(os.path.basename(path)).group(1)
+        with open(path, newline='') as file:
+            next(file, None)  # header
+            for row in file:
+                t_str, t_delta, voltage, mrange, logvoltage, batvoltage = row.rstrip("\r\n").split(",")
+                # .1s deltas are relative to the run's start, so files from the same run stay in step
+                yield int(t_delta) / 10, " ".join((sensor, voltage, mrange, logvoltage, batvoltage))
+
+    start = None
+    for t, line in heapq.merge(*(rows(p) for p in paths)):
+        start = t if start is None else start
+        yield t - start, line
+
+
+def run(simulators, lines, speed=1.0, duration=None):
+    """
+    Write lines to the simulators at their time (divided by speed), spreading them across simulators in turn.
+    Returns the number of lines written.
+    """
+    start = time.monotonic()
+    written = 0
+    targets = count()
+    for t, line in lines:
+        t /= speed
+        if duration is not None and t > duration:
+            break
+
+        delay = start + t - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        sim = simulators[next(targets) % len(simulators)]
+        if isinstance(line, bytes):
+            sim.write(line + b"\r\n")
+        else:
+            sim.write_line(line)
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ports", type=int, default=1, help="number of simulated BaseStations")
+    parser.add_argument("--link", help="symlink to create to the port, e.g. /tmp/ttySIM (numbered with several ports)")
+    parser.add_argument("--format", choices=["lora", "hardwired"], default="lora", help="format of generated lines")
+    parser.add_argument("--sensors", type=int, default=4, help="number of simulated sensors")
+    parser.add_argument("--rate", type=float, default=0.2, help="readings per second from each sensor")
+    parser.add_argument("--noise", type=float, default=0.01, help="volts of random walk per reading")
+    parser.add_argument("--disconnect-prob", type=float, default=0.0,
+                        help="probability a reading is replaced by a \"Couldn't connect to device\" line")
+    parser.add_argument("--garbage-prob", type=float, default=0.0,
+                        help="probability a reading is replaced by random bytes")
+    parser.add_argument("--restart-every", type=float, help="seconds between simulated BaseStation restarts")
+    parser.add_argument("--replay", nargs="+", metavar="PATH",
+                        help="errors.log or day*-sensor*.csv files (or glob patterns) to replay instead")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed, e.g. 1000 for 1000x real time")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--seed", type=int, help="random seed, for reproducible runs")
+    args = parser.parse_args()
+
+    if args.replay:
+        paths = sorted(p for pattern in args.replay for p in glob.glob(pattern))
+        logs = [p for p in paths if p.endswith(".log")]
+        csvs = [p for p in paths if p.endswith(".csv")]
+        lines = heapq.merge(*(replay_errors_log(p) for p in logs), *([replay_csv(csvs)] if csvs else []))
+    else:
+        lines = synthetic_lines(args.sensors, args.rate, args.noise, args.format, args.disconnect_prob,
+                                args.garbage_prob, args.restart_every, args.seed)
+
+    links = [args.link] if args.ports == 1 else [f"{args.link}{i}" for i in range(args.ports)]
+    simulators = [SerialSimulator(link if args.link else None) for link in links]
+    for sim in simulators:
+        print(f"Simulating BaseStation on {sim.port}" + (f" ({sim.link})" if sim.link else ""))
+
+    start = time.monotonic()
+    written = 0
+    try:
+        written = run(simulators, lines, args.speed, args.duration)
+    except KeyboardInterrupt:
+        written = sum(sim.lines_written for sim in simulators)
+    finally:
+        elapsed = time.monotonic() - start
+        dropped = sum(sim.bytes_dropped for sim in simulators)
+        print(f"Wrote {written} lines in {elapsed:.1f} s ({written / max(elapsed, 1e-9):.1f} lines/sec), "
+              f"{dropped} bytes dropped")
+        for sim in simulators:
+            sim.close()
+
+
+if __name__ == "__main__":
+    main()
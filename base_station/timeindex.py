@@ -0,0 +1,283 @@
+"""
+Sparse time indexes of the per-sensor data logs, so the rows of a time range can be read without scanning every file.
+
+Each day{i}-sensor{sensor}.csv gets a sidecar day{i}-sensor{sensor}.csv.idx, kept whether the log is later compressed
+or not. Every line of it is a checkpoint:
+    <time of a row, in seconds since the epoch> <byte offset of that row in the uncompressed log>
+written for the first row, then every `every` rows after it, followed when the log is closed by:
+    end <time of the last row, or - if it has no rows> <size of the log>
+CSVWriter maintains the index of the log it writes to (see index_every). Logs written without one, e.g. before
+indexes existed, can be indexed afterwards:
+    python timeindex.py logs [--every 1000] [--rebuild]
+"""
+import argparse
+import csv
+import io
+import re
+import time
+from bisect import bisect_left, bisect_right
+from glob import glob
+from itertools import chain
+from os import path
+
+from segmentcompressor import COMPRESSED_EXTENSIONS, find_segment, open_segment
+
+INDEX_SUFFIX = ".idx"
+TIME_FORMAT = "%m-%d-%Y %I:%M:%S %p"  # format of the first column of the data logs
+SEGMENT_NAME = re.compile(r"day(\d+)-sensor(\d+)\.csv(?:\.gz|\.zst)?$")
+
+_time_cache = ["", 0.0]  # [last time string parsed, its time], rows mostly share a second with the previous one
+
+
+def parse_time(text):
+    """Parse a data log time string (local time, whole seconds) to seconds since the epoch."""
+    if text != _time_cache[0]:
+        _time_cache[0], _time_cache[1] = text, time.mktime(time.strptime(text, TIME_FORMAT))
+    return _time_cache[1]
+
+
+def is_header(row):
+    """
+    Check if the first row of a log (as a list of strings) is a header (DATA_LOG_HEADER) rather than a reading.
+    Logs written before headers were added start with a reading.
+    """
+    try:
+        parse_time(row[0])
+        return False
+    except (ValueError, IndexError):
+        return True
+
+
+class IndexWriter:
+    def __init__(self, data_path, every=1000):
+        """
+        Appends checkpoints to the index of the log at data_path while it is written. Used by CSVWriter.
+
+        Args:
+            data_path: path of the (uncompressed) log being written.
+            every: rows between checkpoints.
+        """
+        self.file = open(data_path + INDEX_SUFFIX, 'a')
+        self.every = every
+        self.since_checkpoint = 0  # rows added since the last checkpoint, 0 until the first one
+        self.last_time = None
+
+    def add(self, timestamp, tell):
+        """Account for a row received at timestamp, before it is written. tell() gives its offset in the log."""
+        if self.since_checkpoint % self.every == 0:
+            self.file.write(f"{timestamp:.3f} {tell()}\n")
+            self.since_checkpoint = 0
+        self.since_checkpoint += 1
+        self.last_time = timestamp
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self, size):
+        """Record the time of the last row and the size of the log (its offset once closed), then close."""
+        self.file.write(_end_line(self.last_time, size))
+        self.file.close()
+
+
+def _end_line(end_time, size):
+    return f"end {'-' if end_time is None else f'{end_time:.3f}'} {size}\n"
+
+
+class FileIndex:
+    def __init__(self, data_path, times, offsets, end_time=None, size=None):
+        """
+        Checkpoints of one log, sorted by time.
+
+        Args:
+            data_path: path the log was written to (without .gz or .zst).
+            times: time of each checkpoint's row, in seconds since the epoch.
+            offsets: byte offset of each checkpoint's row.
+            end_time: time of the last row, or None if the log has no rows, or wasn't closed (it is still written to,
+                      or wasn't closed cleanly), in which case rows after the last checkpoint can have any later time.
+            size: size of the log when it was closed, or None if it wasn't closed.
+        """
+        self.data_path = data_path
+        self.times = times
+        self.offsets = offsets
+        self.end_time = end_time
+        self.size = size
+
+    @property
+    def start_time(self):
+        return self.times[0] if self.times else None
+
+    def overlaps(self, start=None, end=None):
+        """Check if the log can have rows with times in [start, end]. None leaves that end of the range open."""
+        if not self.times:
+            return self.size is None  # a log without rows can only get some if it wasn't closed
+        return ((end is None or self.times[0] <= end + 1)  # + 1: logged times are truncated to whole seconds
+                and (start is None or self.end_time is None or start <= self.end_time + 1))
+
+    def offset_for(self, start=None, strict=False):
+        """
+        Return the offset of the last checkpoint at or before start, where reading rows from start begins.
+        strict: the last checkpoint before start instead, for rows earlier than their checkpoint but at start.
+        """
+        if not self.offsets:
+            return 0
+        if start is None:
+            i = 0
+        else:
+            i = (bisect_left(self.times, start) if strict else bisect_right(self.times, start)) - 1
+        return self.offsets[max(i, 0)]
+
+
+def read_index(data_path):
+    """Read the index of the log at data_path (without .gz or .zst). Returns None if it has none."""
+    try:
+        with open(data_path + INDEX_SUFFIX) as file:
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        return None
+
+    times, offsets, end_time, size = [], [], None, None
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 3 and fields[0] == "end":
+            end_time, size = None if fields[1] == "-" else float(fields[1]), int(fields[2])
+        elif len(fields) == 2:
+            # the log was appended to after an end line (its writer was reopened), so that end is outdated
+            end_time = size = None
+            times.append(float(fields[0]))
+            offsets.append(int(fields[1]))
+        # anything else is a line cut short by a crash
+
+    # a log written across a clock change can go back in time; keep the checkpoints bisect can use
+    order = sorted(range(len(times)), key=times.__getitem__)
+    return FileIndex(data_path, [times[i] for i in order], [offsets[i] for i in order], end_time, size)
+
+
+def build_index(data_path, every=1000, write=True):
+    """
+    Index a log by scanning it (compressed or not), e.g. one written before indexes existed.
+
+    Args:
+        data_path: path the log was written to (without .gz or .zst).
+        every: rows between checkpoints.
+        write: save the index next to the log. Set to False to only return it (e.g. on a read-only copy).
+
+    Returns:
+        FileIndex: the index built.
+    """
+    times, offsets = [], []
+    last_line = None
+    with open_segment(find_segment(data_path) or data_path, binary=True) as file:
+        first = file.readline()
+        offset = len(first) if is_header(first.decode(errors="replace").split(",", 1)) else 0
+        rows = 0
+        for line in chain([first] if first and not offset else [], file):
+            if rows % every == 0:
+                try:
+                    times.append(parse_time(line.split(b",", 1)[0].decode()))
+                    offsets.append(offset)
+                except ValueError:  # a malformed row, checkpoint the next one instead
+                    rows -= 1
+            rows += 1
+            offset += len(line)
+            last_line = line
+
+    end_time = None
+    if last_line is not None:
+        try:
+            end_time = parse_time(last_line.split(b",", 1)[0].decode())
+        except ValueError:
+            end_time = times[-1] if times else None
+    index = FileIndex(data_path, times, offsets, end_time, offset)
+
+    if write:
+        with open(data_path + INDEX_SUFFIX, 'w') as file:
+            file.writelines(f"{t:.3f} {o}\n" for t, o in zip(times, offsets))
+            file.write(_end_line(end_time, offset))
+    return index
+
+
+def list_segments(root, sensors=None):
+    """
+    Find the data logs in root and every run folder under it.
+
+    Returns:
+        list: (sensor id, day, data path without .gz or .zst) of each log, sorted.
+    """
+    segments = set()
+    for file_path in glob(path.join(root, "**", "day*-sensor*.csv*"), recursive=True):
+        match = SEGMENT_NAME.search(path.basename(file_path))
+        if match is None:  # an index, or a compression in progress
+            continue
+        sensor = int(match.group(2))
+        if sensors is None or sensor in sensors:
+            for ext in COMPRESSED_EXTENSIONS:
+                if file_path.endswith(ext):
+                    file_path = file_path[:-len(ext)]
+            segments.add((sensor, int(match.group(1)), file_path))
+    return sorted(segments)
+
+
+def find_segments(root, sensor, start=None, end=None, every=1000):
+    """
+    Return the indexes of the logs of a sensor (in root and every run folder under it) that can have rows with
+    times in [start, end], sorted by time. Logs without an index are indexed first.
+    """
+    indexes = []
+    for _, _, data_path in list_segments(root, {sensor}):
+        index = read_index(data_path)
+        if index is None:
+            try:
+                index = build_index(data_path, every)
+            except OSError:  # can't write next to the log
+                index = build_index(data_path, every, write=False)
+        if index.overlaps(start, end):
+            indexes.append(index)
+    indexes.sort(key=lambda index: index.start_time or float("inf"))
+    return indexes
+
+
+def read_range(index, start=None, end=None):
+    """
+    Yield the rows of an indexed log with times in [start, end], as lists of strings. Reading starts at the
+    checkpoint before start and stops at the first row after end, so only about that range of the log is read.
+    As logged times are truncated to whole seconds, rows are compared to start and end at that resolution.
+    """
+    start_s = None if start is None else int(start)
+    with open_segment(find_segment(index.data_path) or index.data_path, binary=True) as file:
+        # checkpoints have exact times, rows whole seconds: rows of start_s can come before a checkpoint of start_s
+        offset = index.offset_for(start_s, strict=True)
+        if offset:
+            file.seek(offset)
+        rows = csv.reader(io.TextIOWrapper(file, newline=''))
+        if not offset:
+            first = next(rows, None)
+            rows = chain([first] if first is not None and not is_header(first) else [], rows)
+        for row in rows:
+            try:
+                row_time = parse_time(row[0])
+            except (ValueError, IndexError):
+                continue
+            if end is not None and row_time > end:
+                break
+            if start_s is None or row_time >= start_s:
+                yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", nargs="?", default="logs", help="folder of run folders to index")
+    parser.add_argument("--every", type=int, default=1000, help="rows between checkpoints")
+    parser.add_argument("--rebuild", action="store_true", help="index logs again even if they have an index")
+    args = parser.parse_args()
+
+    built = 0
+    for _, _, data_path in list_segments(args.root):
+        if args.rebuild or read_index(data_path) is None:
+            index = build_index(data_path, args.every)
+            built += 1
+            print(f"{data_path}: {len(index.times)} checkpoints")
+    print(f"Indexed {built} logs.")
+
+
+if __name__ == "__main__":
+    main()
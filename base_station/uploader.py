@@ -0,0 +1,300 @@
+"""
+Copies data logs offsite while they are written, from a background thread. Only bytes not sent yet are read and sent,
+in chunks, so each upload costs the size of the new data rather than of the whole file, and network trouble never
+blocks reading the BaseStation. Progress is kept in a journal file, so uploads resume where they stopped after a
+restart, and failed uploads are retried with exponential backoff.
+
+Targets (see make_target):
+    /some/folder or file:///some/folder   a local folder, e.g. a mounted backup drive
+    http://host:port/prefix               HTTP PUTs with a Content-Range header
+    s3://bucket/prefix                    S3, each range a separate object (needs boto3)
+
+For testing, a local HTTP stand-in can receive uploads into a folder:
+    python uploader.py serve received --port 8000
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from traceback import format_exc
+
+
+class UploadTarget:
+    """Where uploaded files are stored. Keys are relative paths with / separators, e.g. "<run folder>/day1-sensor3.csv"."""
+
+    def upload_range(self, key, offset, data):
+        """Store data at offset of the remote copy of key. Sending a range again must overwrite it."""
+        raise NotImplementedError
+
+    def finish(self, key, size):
+        """Called once a file is closed and every byte of it (size bytes) was stored."""
+
+
+class LocalDirectoryTarget(UploadTarget):
+    def __init__(self, directory):
+        """Stores uploads under a local folder, e.g. a mounted backup drive. Also a stand-in target for testing."""
+        self.directory = directory
+
+    def _path(self, key):
+        file_path = os.path.normpath(os.path.join(self.directory, *key.split("/")))
+        if os.path.commonpath([file_path, os.path.abspath(self.directory)]) != os.path.abspath(self.directory):
+            raise ValueError(f"Key {key} is outside of {self.directory}")
+        return file_path
+
+    def upload_range(self, key, offset, data):
+        file_path = self._path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'r+b' if os.path.exists(file_path) else 'wb') as file:
+            file.seek(offset)
+            file.write(data)
+
+
+class HttpTarget(UploadTarget):
+    def __init__(self, base_url, timeout=30):
+        """PUTs each range to <base_url>/<key> with a "Content-Range: bytes <first>-<last>/*" header."""
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def upload_range(self, key, offset, data):
+        request = urllib.request.Request(f"{self.base_url}/{urllib.parse.quote(key)}", data=data, method="PUT",
+                                         headers={"Content-Range": f"bytes {offset}-{offset + len(data) - 1}/*",
+                                                  "Content-Type": "application/octet-stream"})
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass  # errors are raised as urllib.error.URLError / HTTPError
+
+
+class S3Target(UploadTarget):
+    def __init__(self, bucket, prefix=""):
+        """
+        S3 objects can't be appended to, so each range is stored as its own object, <prefix>/<key>/<offset>
+        (offset zero padded to 12 digits). Concatenating them in name order gives the file.
+        """
+        import boto3  # only needed for this target
+
+        self.client = boto3.client('s3')
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def upload_range(self, key, offset, data):
+        object_key = f"{self.prefix}/{key}/{offset:012d}" if self.prefix else f"{key}/{offset:012d}"
+        self.client.put_object(Bucket=self.bucket, Key=object_key, Body=data)
+
+
+def make_target(url):
+    """Make the UploadTarget for a URL: s3://bucket/prefix, http(s)://..., file:///folder or a folder path."""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme == "s3":
+        return S3Target(parsed.netloc, parsed.path)
+    if parsed.scheme in ("http", "https"):
+        return HttpTarget(url)
+    if parsed.scheme == "file":
+        return LocalDirectoryTarget(urllib.request.url2pathname(parsed.path))
+    return LocalDirectoryTarget(url)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """Limits a flow to rate units per second on average, allowing bursts of up to burst units (default: rate)."""
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def delay(self, amount):
+        """Take amount units, returning the seconds to wait before using them."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - amount
+        self.updated = now
+        return max(0.0, -self.tokens / self.rate)
+
+
+class Uploader(threading.Thread):
+    def __init__(self, target, journal_path, chunk_size=256 * 1024, rate_limit=None, poll_interval=5.0,
+                 min_backoff=1.0, max_backoff=300.0, on_error=None, on_finished=None):
+        """
+        Uploads the new bytes of tracked files to target, one chunk at a time.
+
+        Args:
+            target: UploadTarget to store files in.
+            journal_path: file recording which files are tracked and how many of their bytes were sent.
+                          Files left in it by a previous run are uploaded too, as closed files.
+            chunk_size: most bytes sent per request.
+            rate_limit: most bytes sent per second on average, or None for no limit.
+            poll_interval: seconds between checks for new bytes in tracked files.
+            min_backoff, max_backoff: range of the seconds waited after a failed upload, doubling at each failure.
+            on_error: called with a traceback string the first time an upload fails after succeeding.
+            on_finished: called with the path of each closed file once all of it was uploaded,
+                         e.g. to compress it (it mustn't be changed before then).
+        """
+        super().__init__(name="Uploader", daemon=True)
+        self.target = target
+        self.journal_path = journal_path
+        self.chunk_size = chunk_size
+        self.bucket = TokenBucket(rate_limit, max(rate_limit, chunk_size)) if rate_limit else None
+        self.poll_interval = poll_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.on_error = on_error
+        self.on_finished = on_finished
+        self.bytes_sent = 0
+        self.failures = 0  # consecutive failed uploads
+        self._lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._files = self._load_journal()  # path -> {"key": str, "sent": int, "closed": bool}
+
+    def _load_journal(self):
+        try:
+            with open(self.journal_path) as file:
+                files = json.load(file)["files"]
+        except FileNotFoundError:
+            return {}
+        for entry in files.values():
+            entry["closed"] = True  # files of a previous run aren't written to anymore
+        return files
+
+    def _save_journal(self):
+        """Write the journal under a temporary name, then rename it, so it is never left half written."""
+        with self._journal_lock:  # saved from the caller's thread and this one
+            with self._lock:
+                data = json.dumps({"files": self._files}, indent=1)
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, 'w') as file:
+                file.write(data)
+            os.replace(tmp_path, self.journal_path)
+
+    def track(self, file_path, key=None):
+        """Upload file_path as it grows, under key (default: its name). Tracking a tracked file does nothing."""
+        with self._lock:
+            if file_path in self._files:
+                return
+            self._files[file_path] = {"key": key or os.path.basename(file_path), "sent": 0, "closed": False}
+        self._save_journal()
+        self._wake.set()
+
+    def close_file(self, file_path, key=None):
+        """Mark a file as closed: it won't grow anymore, so it is finished once uploaded. Tracks it if it wasn't."""
+        with self._lock:
+            entry = self._files.setdefault(file_path, {"key": key or os.path.basename(file_path), "sent": 0})
+            entry["closed"] = True
+        self._save_journal()
+        self._wake.set()
+
+    @property
+    def pending(self):
+        """Number of tracked files not finished uploading, or still growing."""
+        with self._lock:
+            return len(self._files)
+
+    def _upload_next(self):
+        """Send one chunk, or finish one file. Returns False if there was nothing to do."""
+        with self._lock:
+            files = list(self._files.items())
+
+        for file_path, entry in files:
+            try:
+                size = os.path.getsize(file_path)
+            except FileNotFoundError:  # removed before it was uploaded, nothing left to send
+                size = None
+            if size is not None and size < entry["sent"]:  # replaced by a shorter file, start again
+                entry["sent"] = 0
+
+            if size is not None and entry["sent"] < size:
+                with open(file_path, 'rb') as file:
+                    file.seek(entry["sent"])
+                    data = file.read(min(self.chunk_size, size - entry["sent"]))
+                if self.bucket:
+                    self._stopping.wait(self.bucket.delay(len(data)))
+                self.target.upload_range(entry["key"], entry["sent"], data)
+                entry["sent"] += len(data)
+                self.bytes_sent += len(data)
+                with self._lock:  # take turns with the other files, so a fast growing file can't hold up the rest
+                    self._files[file_path] = self._files.pop(file_path)
+                self._save_journal()
+                return True
+
+            if entry["closed"]:
+                if size is not None:
+                    self.target.finish(entry["key"], size)
+                with self._lock:
+                    del self._files[file_path]
+                self._save_journal()
+                if self.on_finished and size is not None:
+                    self.on_finished(file_path)
+                return True
+        return False
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                busy = self._upload_next()
+                self.failures = 0
+            except Exception:
+                if self.failures == 0 and self.on_error:
+                    self.on_error(format_exc())
+                self.failures += 1
+                self._stopping.wait(min(self.max_backoff, self.min_backoff * 2 ** (self.failures - 1)))
+                continue
+            if not busy:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def stop(self, timeout=None):
+        """Stop after the chunk being sent. Whatever is left is uploaded by the next Uploader with this journal."""
+        self._stopping.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Receives HttpTarget uploads into the folder of the server's LocalDirectoryTarget."""
+
+    def do_PUT(self):
+        try:
+            content_range = self.headers.get("Content-Range", "bytes 0-")
+            offset = int(content_range.split()[1].split("-")[0])
+            data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            key = urllib.parse.unquote(urllib.parse.urlparse(self.path).path).lstrip("/")
+            self.server.target.upload_range(key, offset, data)
+        except (ValueError, IndexError) as e:
+            self.send_error(400, str(e))
+            return
+        self.send_response(204)
+        self.end_headers()
+
+
+def serve(directory, port=8000, host="127.0.0.1"):
+    """Run a local HTTP server storing HttpTarget uploads in directory, until interrupted."""
+    server = ThreadingHTTPServer((host, port), _StandInHandler)
+    server.target = LocalDirectoryTarget(directory)
+    print(f"Receiving uploads on http://{host}:{port}/ into {directory}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="receive HTTP uploads into a folder, for testing")
+    serve_parser.add_argument("directory")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.directory, args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
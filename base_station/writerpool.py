@@ -0,0 +1,87 @@
+from collections import Counter, OrderedDict
+
+
+class WriterPool:
+    def __init__(self, open_writer, max_open=64):
+        """
+        Keeps at most max_open writers (and their files) open, closing the least recently used one when another
+        has to be opened. A closed writer is opened again by open_writer the next time it is needed, and appends
+        to the same file, so writers can be evicted at any time without losing rows.
+
+        Args:
+            open_writer: called with a key (e.g. a sensor id) to open its writer. The writer must have close()
+                         and a path attribute, like CSVWriter and BinarySeriesWriter.
+            max_open: most writers kept open at once.
+        """
+        self.open_writer = open_writer
+        self.max_open = max_open
+        self._open = OrderedDict()  # key -> writer, least recently used first
+        self.paths = {}  # key -> file written to since the last rotation, including by evicted writers
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._open)
+
+    def __contains__(self, key):
+        return key in self._open
+
+    def get(self, key):
+        """Return the writer for key, opening it (and closing the least recently used writer if needed)."""
+        writer = self._open.get(key)
+        if writer is not None:
+            self._open.move_to_end(key)
+            return writer
+
+        while len(self._open) >= self.max_open:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+            self.evictions += 1
+        writer = self._open[key] = self.open_writer(key)
+        self.paths[key] = writer.path
+        return writer
+
+    def writers(self):
+        """Return the writers that are open now."""
+        return list(self._open.values())
+
+    def rotate(self):
+        """
+        Close every writer, so each is opened again (on whatever file open_writer now gives) when next needed.
+
+        Returns:
+            list: the files written to since the last rotation, which won't be written to again.
+        """
+        closed = list(self.paths.values())
+        self.close()
+        self.paths.clear()
+        return closed
+
+    def close(self):
+        while self._open:
+            self._open.popitem()[1].close()
+
+
+class SensorLimit:
+    def __init__(self, allowed=None, max_sensors=None):
+        """
+        Decides which sensor ids get data logs, so a mis-parsed or noisy id can't create files without bound.
+
+        Args:
+            allowed: sensor ids to accept, or None to accept any id.
+            max_sensors: most distinct ids accepted, or None for no limit. Ids are accepted first come, first served.
+        """
+        self.allowed = None if allowed is None else set(allowed)
+        self.max_sensors = max_sensors
+        self.accepted = set()
+        self.rejected = Counter()  # sensor id -> readings rejected
+
+    def admit(self, sensor_id, count=1):
+        """Check if readings from sensor_id should be kept. Counts the count readings in rejected if not."""
+        if sensor_id in self.accepted:
+            return True
+        if (self.allowed is None or sensor_id in self.allowed) and (
+                self.max_sensors is None or len(self.accepted) < self.max_sensors):
+            self.accepted.add(sensor_id)
+            return True
+        self.rejected[sensor_id] += count
+        return False
@@ -0,0 +1,64 @@
+"""
+Measures the cost per reading of converting voltages to temperatures: the previous conversion (np.interp on the
+table's Python lists, one reading at a time) against calibration.py, one reading at a time and in batches.
+
+Run from anywhere: python benchmarks/bench_calibration.py [--readings N] [--batch N]
+"""
+import argparse
+import sys
+import time
+from os import path
+
+import numpy as np
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from calibration import (convert_voltage_to_temperature, convert_voltages_to_temperatures, inputValues,
+                         outputValues)
+
+
+def previous_convert_voltage_to_temperature(voltage):
+    """The previous conversion, in live_plot_logger.py."""
+    if voltage >= 5.0:
+        return voltage  # treat as direct temperature
+    else:
+        return np.interp(voltage, inputValues, outputValues)  # interpolate from lookup table
+
+
+def per_reading(convert, voltages):
+    start = time.perf_counter()
+    for voltage in voltages:
+        convert(voltage)
+    return (time.perf_counter() - start) / len(voltages)
+
+
+def per_batch(voltages, batch):
+    start = time.perf_counter()
+    for i in range(0, len(voltages), batch):
+        convert_voltages_to_temperatures(voltages[i:i + batch])
+    return (time.perf_counter() - start) / len(voltages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=100_000, help="readings converted")
+    parser.add_argument("--batch", type=int, default=50, help="readings per batch (about an update of the plot)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    voltages = rng.uniform(-0.015, 3.199, args.readings)
+    voltages[::100] = 21.5  # some readings are temperatures already
+    as_floats = voltages.tolist()  # as parsed from the serial port
+
+    previous = per_reading(previous_convert_voltage_to_temperature, as_floats[:max(args.readings // 20, 1)])
+    scalar = per_reading(convert_voltage_to_temperature, as_floats)
+    batch = per_batch(as_floats, args.batch)
+    whole = per_batch(voltages, args.readings)
+    for name, seconds in (("previous, one reading at a time", previous),
+                          ("calibration, one reading at a time", scalar),
+                          (f"calibration, in batches of {args.batch}", batch),
+                          (f"calibration, in one batch of {args.readings}", whole)):
+        print(f"{name:<42} {seconds * 1e6:8.3f} us/reading")
+
+if __name__ == "__main__":
+    main()